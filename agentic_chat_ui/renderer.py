@@ -0,0 +1,149 @@
+"""Markdown and HTML for the chat, rendered once per message.
+
+A streamed answer formats each step once, when it arrives, and the chat
+history keeps every message's finished HTML fragment, so a rerun only emits
+the fragments of the page being shown.
+"""
+
+
+def format_step(entry):
+    """Markdown for one step result."""
+    ai_message = ""
+    step_name = entry.get("step", "Step")
+    ai_message += f"\n**{step_name}**\n"
+
+    if "data" in entry:
+        data = entry["data"]
+
+        # Dynamically format data based on step
+        if step_name == "Claim retrieved":
+            ai_message += "\n**Claim Details:**\n"
+            ai_message += f"- **Claim ID:** {data.get('claim_id', 'N/A')}\n"
+            ai_message += f"- **Claim Number:** {data.get('claim_number', 'N/A')}\n"
+            ai_message += f"- **Description:** {data.get('description', 'N/A')}\n"
+            ai_message += f"- **Loss Date:** {data.get('loss_date', 'N/A')}\n"
+            ai_message += f"- **Status:** {data.get('status', 'N/A')}\n"
+            ai_message += f"- **Policy ID:** {data.get('policy_id', 'N/A')}\n"
+
+            # Format Accident Details
+            accident_details = data.get("accident_details", {})
+            if accident_details:
+                ai_message += "\n**Accident Details:**\n"
+                location = accident_details.get("location", {})
+                ai_message += f"- **Location:** {location.get('street', 'N/A')}, {location.get('city', 'N/A')}, {location.get('state', 'N/A')} {location.get('zip_code', 'N/A')}\n"
+                ai_message += f"- **Damage Estimate:** ${accident_details.get('damage_estimate', 'N/A')}\n"
+                injuries = accident_details.get("injuries", [])
+                if injuries:
+                    ai_message += "\n**Injuries:**\n"
+                    for injury in injuries:
+                        ai_message += f"  - **Name:** {injury.get('name', 'N/A')}, **Type:** {injury.get('type', 'N/A')}, **Severity:** {injury.get('severity', 'N/A')}\n"
+
+        elif step_name == "Policy details fetched":
+            ai_message += "\n**Policy Details:**\n"
+            ai_message += f"- **Policy ID:** {data.get('policy_id', 'N/A')}\n"
+            ai_message += f"- **Policy Number:** {data.get('policy_number', 'N/A')}\n"
+            ai_message += f"- **LOB:** {data.get('lob', 'N/A')}\n"
+            ai_message += f"- **Policyholder Name:** {data.get('policyholder_name', 'N/A')}\n"
+            ai_message += f"- **Status:** {data.get('status', 'N/A')}\n"
+
+        elif step_name == "Policy coverages fetched":
+            ai_message += "\n**Coverages:**\n"
+            for coverage in data:
+                ai_message += f"- {coverage}\n"
+
+        elif step_name == "Policy endorsements fetched":
+            ai_message += "\n**Endorsements:**\n"
+            for endorsement in data:
+                ai_message += f"- **Code:** {endorsement.get('code', 'N/A')}, **Title:** {endorsement.get('title', 'N/A')}\n"
+
+        elif step_name == "Documents retrieved":
+            ai_message += "\n**Documents:**\n"
+            for document in data:
+                ai_message += f"- **Filename:** {document.get('filename', 'N/A')}, **Content Type:** {document.get('content_type', 'N/A')}\n"
+
+        elif step_name == "Injuries retrieved":
+            ai_message += "\n**Injuries:**\n"
+            for injury in data:
+                ai_message += f"- **Description:** {injury.get('description', 'N/A')}, **Severity:** {injury.get('severity', 'N/A')}, **Body Parts:** {', '.join(injury.get('body_parts', []) or ['N/A'])}\n"
+
+        elif step_name == "Claim analysis completed":
+            ai_message += "\n**AI Analysis:**\n"
+            ai_message += f"- **Risk Score:** {data.get('risk_score', 'N/A')}\n"
+            ai_message += f"- **Documents Analyzed:** {data.get('documents_analyzed', 'N/A')}\n"
+            findings = data.get("key_findings", [])
+            if findings:
+                ai_message += "\n**Key Findings:**\n"
+                for finding in findings:
+                    ai_message += f"- {finding}\n"
+            actions = data.get("recommended_actions", [])
+            if actions:
+                ai_message += "\n**Recommended Actions:**\n"
+                for action in actions:
+                    ai_message += f"- **{action.get('priority', 'N/A')}:** {action.get('action', 'N/A')}\n"
+            codes = data.get("icd10_codes", [])
+            if codes:
+                ai_message += "\n**ICD-10 Codes:**\n"
+                for code in codes:
+                    ai_message += f"- **{code.get('code', 'N/A')}:** {code.get('description', 'N/A')}\n"
+            coverage = data.get("coverage_analysis", {})
+            if coverage:
+                ai_message += "\n**Coverage Analysis:**\n"
+                ai_message += f"- **Adequacy:** {coverage.get('adequacy', 'N/A')}\n"
+                for gap in coverage.get("gaps", []):
+                    ai_message += f"- **Gap:** {gap}\n"
+
+        elif step_name == "Claim analysis in progress":
+            ai_message += f"\n:hourglass: {entry.get('message', '')} (job `{data.get('job_id', 'N/A')}`, {data.get('status', 'N/A')})\n"
+
+    elif "message" in entry:
+        ai_message += f"\n:warning: {entry['message']}\n"
+    return ai_message
+
+
+class MessageBuilder:
+    """An assistant answer assembled from streamed steps, in plan order."""
+
+    def __init__(self):
+        self._steps = {}  # index -> (step name, markdown)
+
+    def add(self, index, entry):
+        self._steps[index] = (entry.get("step", "Step"), format_step(entry))
+
+    def markdown(self):
+        steps = [self._steps[i] for i in sorted(self._steps)]
+        return (
+            "### 🧠 Actions Executed\n"
+            + "".join(f"- {name}\n" for name, _ in steps)
+            + "\n### 📊 Details\n"
+            + "".join(markdown for _, markdown in steps)
+        )
+
+
+def bubble(role, content):
+    """HTML of one chat bubble."""
+    if role == "user":
+        return f"""
+            <div style='background:#4B8BBE;color:white;padding:10px 16px;border-radius:12px;margin-bottom:8px;max-width:80%;align-self:flex-end;text-align:right;'>
+                <b>You:</b> {content}
+            </div>
+            """
+    return f"""
+            <div style='background:#f0f2f6;color:#22314a;padding:10px 16px;border-radius:12px;margin-bottom:8px;max-width:80%;'>
+                <b>AI:</b><br>{content}
+            </div>
+            """
+
+
+def message(role, content):
+    """Chat history entry with its pre-rendered HTML."""
+    return {"role": role, "content": content, "html": bubble(role, content)}
+
+
+def page_count(total, window):
+    return max(1, -(-total // window))
+
+
+def history_page(history, page, window):
+    """Messages on ``page`` of ``history`` (0 is the newest), oldest first."""
+    end = max(len(history) - page * window, 0)
+    return history[max(end - window, 0):end]
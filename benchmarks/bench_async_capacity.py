@@ -0,0 +1,167 @@
+"""Concurrent-request capacity of the threaded vs. the asyncio orchestrator.
+
+Both run as single processes against an async ClaimCenter stub that answers
+every request after ``--delay`` seconds. The threaded orchestrator runs
+under one gunicorn worker (``--sync-threads`` request threads); the async
+one is ``async_orchestrator.py``. For each concurrency level, that many
+clients keep one orchestration each in flight for ``--duration`` seconds:
+
+    python benchmarks/bench_async_capacity.py --delay 0.1 --concurrency 50,500,2000
+
+Composite requests and the entity cache are off, so every orchestration
+makes its individual upstream calls (claim -> policy -> coverages +
+endorsements).
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from bench_serving import free_port, stop
+from stubs import COMMON, ROOT, load_service, percentile
+
+PROMPT = "Show claim details, coverages and endorsements"
+
+
+def run_stub(port, delay):
+    """Async ClaimCenter: the real app's responses, memoized per URL, each
+    served after ``delay`` seconds without tying up a thread."""
+    client = load_service("claimcenter_api").app.test_client()
+    responses = {}
+
+    async def handle(request):
+        await asyncio.sleep(delay)
+        if request.path_qs not in responses:
+            resp = client.get(request.path_qs)
+            responses[request.path_qs] = (resp.status_code, resp.data, resp.content_type)
+        status, body, content_type = responses[request.path_qs]
+        return web.Response(status=status, body=body, headers={"Content-Type": content_type})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None, backlog=4096)
+
+
+def start_orchestrator(mode, upstream_url, args):
+    port = free_port()
+    env = dict(
+        os.environ, PORT=str(port), PYTHONPATH=COMMON, CLAIMCENTER_BASE=upstream_url,
+        MCP_LOG_LEVEL="WARNING", MCP_CACHE_SIZE="0", CLAIMCENTER_COMPOSITE="0",
+        CLAIMCENTER_READ_TIMEOUT="60",
+    )
+    if mode == "threaded":
+        env.update(
+            GUNICORN_WORKERS="1", GUNICORN_THREADS=str(args.sync_threads),
+            MCP_MAX_WORKERS=str(args.sync_step_workers),
+        )
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "orchestrator:app"]
+    else:
+        env.update(MCP_ASYNC_POOL_SIZE=str(args.pool))
+        cmd = [sys.executable, "async_orchestrator.py"]
+    proc = subprocess.Popen(
+        cmd, cwd=os.path.join(ROOT, "mcp"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    wait_until_up(url)
+    return proc, url
+
+
+def wait_until_up(url, timeout=30):
+    async def probe():
+        async with aiohttp.ClientSession() as session:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                try:
+                    async with session.get(f"{url}/metrics") as resp:
+                        if resp.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.1)
+            raise RuntimeError(f"{url} did not start")
+
+    asyncio.run(probe())
+
+
+async def load(url, concurrency, duration, timeout):
+    """``concurrency`` closed-loop clients; returns (latencies, errors,
+    elapsed), elapsed including the requests still in flight at the end."""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    deadline = started + duration
+    connector = aiohttp.TCPConnector(limit=0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+
+        async def client(i):
+            nonlocal errors
+            body = {"prompt": PROMPT, "claim_id": f"claim_{1 + i % 2}"}
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.post(f"{url}/orchestrate", json=body) as resp:
+                        await resp.read()
+                        ok = resp.status == 200
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.1, help="upstream latency (s)")
+    parser.add_argument("--concurrency", default="50,200,1000,2000")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout (s)")
+    parser.add_argument("--modes", default="threaded,async")
+    parser.add_argument("--sync-threads", type=int, default=16)
+    parser.add_argument("--sync-step-workers", type=int, default=32)
+    parser.add_argument("--pool", type=int, default=1000, help="async upstream connections")
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = multiprocessing.Process(target=run_stub, args=(stub_port, args.delay), daemon=True)
+    stub.start()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    wait_until_up(stub_url)
+
+    print(
+        f"upstream delay {args.delay * 1000:.0f} ms, {args.duration:.0f} s per level,"
+        f" {os.cpu_count()} CPUs; threaded = 1 gunicorn worker x {args.sync_threads} threads"
+    )
+    try:
+        for mode in args.modes.split(","):
+            proc, url = start_orchestrator(mode, stub_url, args)
+            try:
+                for concurrency in map(int, args.concurrency.split(",")):
+                    latencies, errors, elapsed = asyncio.run(
+                        load(url, concurrency, args.duration, args.timeout)
+                    )
+                    print(
+                        f"  {mode:<9} concurrency {concurrency:5d}"
+                        f"  {len(latencies) / elapsed:7.0f} req/s"
+                        f"  p50 {percentile(latencies, 50) * 1000:8.1f} ms"
+                        f"  p99 {percentile(latencies, 99) * 1000:8.1f} ms"
+                        f"  errors {errors}"
+                    )
+            finally:
+                stop(proc)
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Startup time, memory and lookup latency of the ClaimCenter storage backends.
+
+Compares the original eager whole-file dicts with the lazy JsonStore and the
+indexed SqliteStore on a generated book of business:
+
+    python benchmarks/bench_claimcenter_storage.py --claims 1000000
+
+Each backend is measured in a fresh subprocess so RSS figures don't mix.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE = os.path.join(ROOT, "claimcenter_api")
+sys.path.insert(0, SERVICE)
+
+BACKENDS = ("dict", "json-lazy", "sqlite")
+
+
+class EagerDicts:
+    """What app.py did before the storage layer: json.load every file at import."""
+
+    def __init__(self, data_dir):
+        from storage import JsonStore
+
+        self.store = JsonStore(data_dir)
+        self.store.load_all()
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+def measure(backend, data_dir, db_path, lookups, claims):
+    from storage import JsonStore, SqliteStore
+
+    start = time.perf_counter()
+    if backend == "dict":
+        store = EagerDicts(data_dir)
+    elif backend == "json-lazy":
+        store = JsonStore(data_dir)
+    else:
+        store = SqliteStore(db_path)
+    startup = time.perf_counter() - start
+
+    rng = random.Random(7)
+    start = time.perf_counter()
+    store.claim("claim_0")
+    first = time.perf_counter() - start
+
+    samples = []
+    for _ in range(lookups):
+        claim_id = f"claim_{rng.randrange(claims)}"
+        start = time.perf_counter()
+        claim = store.claim(claim_id)
+        store.documents(claim_id)
+        store.policy(claim["policy_id"])
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    found = store.search_claims(status="Reopened", lob="Auto", loss_date_from="2025-12-01", limit=100)
+    search = time.perf_counter() - start
+
+    samples.sort()
+    return {
+        "startup_ms": startup * 1000,
+        "first_lookup_ms": first * 1000,
+        "lookup_p50_us": samples[len(samples) // 2] * 1e6,
+        "lookup_p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "search_ms": search * 1000,
+        "search_hits": len(found),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "anon_rss_mb": anon_rss_mb(),
+    }
+
+
+def anon_rss_mb():
+    # Private memory only; SQLite's mmap pages are file-backed and shareable
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--claims", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "claimcenter-bench"))
+    parser.add_argument("--measure", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    data_dir = os.path.join(args.work_dir, f"data-{args.claims}")
+    db_path = os.path.join(args.work_dir, f"claimcenter-{args.claims}.db")
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, data_dir, db_path, args.lookups, args.claims)))
+        return
+
+    from generate_data import generate, write
+    from storage import import_json
+
+    if not os.path.exists(os.path.join(data_dir, "injuries.json")):
+        print(f"Generating {args.claims} claims into {data_dir} ...")
+        write(data_dir, generate(args.claims))
+    if not os.path.exists(db_path):
+        start = time.perf_counter()
+        import_json(data_dir, db_path)
+        print(f"Imported into {db_path} in {time.perf_counter() - start:.1f}s")
+
+    print(f"\n{args.claims} claims, {args.lookups} random claim+documents+policy lookups")
+    print(f"{'backend':<10} {'startup':>10} {'1st lookup':>11} {'p50':>9} {'p99':>9} {'search':>9} {'max RSS':>9} {'anon RSS':>9}")
+    for backend in BACKENDS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--measure", backend, "--claims", str(args.claims),
+             "--lookups", str(args.lookups), "--work-dir", args.work_dir],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out)
+        print(
+            f"{backend:<10} {r['startup_ms']:8.1f}ms {r['first_lookup_ms']:9.1f}ms"
+            f" {r['lookup_p50_us']:7.1f}us {r['lookup_p99_us']:7.1f}us"
+            f" {r['search_ms']:7.1f}ms {r['max_rss_mb']:7.0f}MB {r['anon_rss_mb']:7.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
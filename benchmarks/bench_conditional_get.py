@@ -0,0 +1,85 @@
+"""Bytes on the wire and latency of repeated ClaimCenter reads: serialized
+per request (as before), served from the response cache, gzip-compressed,
+and revalidated with If-None-Match.
+
+    python benchmarks/bench_conditional_get.py --claims 2000 --multi 100
+
+Runs ClaimCenter on a generated book of business behind the keep-alive
+stub server and reads each URL over a pooled requests session.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from stubs import ROOT, StubServer, load_service
+
+EXPAND = "policy,coverages,endorsements,documents,injuries"
+
+
+def measure(session, url, headers, iterations):
+    """Median latency (decoding included) and wire bytes of a response."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        resp = session.get(url, headers=headers)
+        if resp.status_code == 200:
+            resp.json()
+        samples.append(time.perf_counter() - start)
+    assert resp.status_code in (200, 304), resp.status_code
+    return statistics.median(samples), resp.raw.tell(), resp.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--claims", type=int, default=2000)
+    parser.add_argument("--multi", type=int, default=100, help="claims per multi-get")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "claimcenter_api", "generate_data.py"),
+             data_dir, "--claims", str(args.claims)],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        os.environ["CLAIMCENTER_DATA_DIR"] = data_dir
+        claimcenter = load_service("claimcenter_api")
+        responses = claimcenter.responses
+        ids = ",".join(f"claim_{i}" for i in range(args.multi))
+        urls = {
+            "claim": f"/claims/claim_1?expand={EXPAND}",
+            f"{args.multi} claims": f"/claims?ids={ids}&expand={EXPAND}",
+        }
+
+        with StubServer(claimcenter.app) as stub, requests.Session() as session:
+            for name, path in urls.items():
+                url = stub.url + path
+                identity = {"Accept-Encoding": "identity"}
+                modes = {
+                    # maxsize=0 serializes every request, as before the cache
+                    "per request": (0, identity),
+                    "cached": (10000, identity),
+                    "gzip": (10000, {"Accept-Encoding": "gzip"}),
+                    "304": (10000, None),
+                }
+                print(f"\n{name}")
+                for mode, (maxsize, headers) in modes.items():
+                    responses.maxsize = maxsize
+                    if headers is None:
+                        etag = session.get(url, headers=identity).headers["ETag"]
+                        headers = dict(identity, **{"If-None-Match": etag})
+                    median, wire, status = measure(session, url, headers, args.iterations)
+                    print(
+                        f"  {mode:<12} {status}  median {median * 1000:7.2f} ms"
+                        f"  {wire:9,d} bytes"
+                    )
+
+
+if __name__ == "__main__":
+    main()
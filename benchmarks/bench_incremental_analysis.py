@@ -0,0 +1,65 @@
+"""Cost of re-analyzing a claim as documents are added to it, with and
+without the per-document findings store.
+
+A claim grows from 1 to ``--documents`` documents, one at a time, and is
+analyzed through ClaimLens ``POST /analyze`` after every addition. Every
+analyzed document costs ``--doc-seconds``:
+
+    python benchmarks/bench_incremental_analysis.py --documents 20 --doc-seconds 0.02
+
+Without the store each analysis re-reads every document, so its cost grows
+with the claim; with it, each analysis costs one new document.
+"""
+import argparse
+import time
+
+from stubs import load_service
+
+KINDS = ["police_report", "medical_summary", "repair_estimate", "photos", "witness_statement"]
+
+
+def grow(client, claim_id, count):
+    """Yield (documents, seconds, reused) after adding each document."""
+    documents = []
+    for n in range(count):
+        documents.append({
+            "document_id": f"{claim_id}_doc_{n}",
+            "filename": f"{KINDS[n % len(KINDS)]}_{n}.pdf",
+            "content_type": "application/pdf",
+        })
+        start = time.perf_counter()
+        resp = client.post("/analyze", json={"claim_id": claim_id, "documents": documents})
+        elapsed = time.perf_counter() - start
+        assert resp.status_code == 200, resp.get_json()
+        yield len(documents), elapsed, resp.get_json()["documents_reused"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--doc-seconds", type=float, default=0.02)
+    args = parser.parse_args()
+
+    claimlens = load_service("claimlens_api")
+    engine = claimlens.engine
+    engine.SECONDS_PER_DOCUMENT = args.doc_seconds
+    client = claimlens.app.test_client()
+
+    runs = {}
+    for mode, store in (("full", engine.FindingsStore(0)), ("incremental", engine.FindingsStore())):
+        engine.findings_store = store
+        runs[mode] = list(grow(client, f"bench_{mode}", args.documents))
+
+    print(f"{args.doc_seconds * 1000:.0f} ms per analyzed document")
+    print(f"{'documents':>9}  {'full ms':>9}  {'incremental ms':>14}  {'reused':>6}")
+    for (count, full, _), (_, incremental, reused) in zip(runs["full"], runs["incremental"]):
+        print(f"{count:9d}  {full * 1000:9.1f}  {incremental * 1000:14.1f}  {reused:6d}")
+    totals = {mode: sum(s for _, s, _ in samples) for mode, samples in runs.items()}
+    print(
+        f"total     {totals['full'] * 1000:9.1f}  {totals['incremental'] * 1000:14.1f}"
+        f"  ({totals['full'] / totals['incremental']:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Per-request CPU cost of orchestrator logging at different levels.
+
+Dispatches /orchestrate in-process against an in-memory ClaimCenter (no
+HTTP, entity cache and composite requests off, so every request handles
+five upstream payloads), with all output sent to /dev/null. Besides the
+structured logging levels it runs the old ``print(json.dumps(..., indent=2))``
+path and a baseline with logging off. The modes are interleaved over several
+rounds; each one reports its median process CPU per request and how much of
+that is logging, i.e. the difference from the baseline.
+
+    python benchmarks/bench_logging.py --requests 300 --documents 100
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import time
+
+from stubs import load_service
+
+# label -> (MCP_LOG_LEVEL, payload sample rate, old prints)
+MODES = {
+    "baseline, logging off": ("CRITICAL", 0.0, False),
+    "old print(json.dumps(indent=2))": ("CRITICAL", 0.0, True),
+    "INFO, payload logging off": ("INFO", 0.0, False),
+    "DEBUG, payloads sampled 10%": ("DEBUG", 0.1, False),
+    "DEBUG, every payload": ("DEBUG", 1.0, False),
+}
+BODY = {"prompt": "Show coverages, endorsements and documents", "claim_id": "claim_0"}
+
+
+def claimcenter_data(documents):
+    """The resources the prompt reads, for one generated claim given
+    ``documents`` documents."""
+    import generate_data
+
+    data = {}
+    for name, key, value in generate_data.generate(2, seed=1):
+        if key in ("claim_0", "policy_0"):
+            data.setdefault(name, value)
+    data["documents"] = [
+        {
+            "document_id": f"doc_0_{n}",
+            "filename": f"{n:04d}_{data['documents'][n % len(data['documents'])]['filename']}",
+            "content_type": "application/pdf",
+            "uploaded_by": "adjuster@example.com",
+            "uploaded_at": "2025-03-01T12:00:00Z",
+        }
+        for n in range(documents)
+    ]
+    return {
+        "/claims/claim_0": data["claims"],
+        "/policies/policy_0": data["policies"],
+        "/policies/policy_0/coverages": data["coverages"],
+        "/policies/policy_0/endorsements": data["endorsements"],
+        "/claims/claim_0/documents": data["documents"],
+    }
+
+
+class InMemoryClaimCenter:
+    """Stands in for the orchestrator's ClaimCenter client, serving
+    ``responses`` ({path: Fetched})."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.print_payloads = False
+
+    def url(self, path):
+        return path
+
+    def get(self, url, headers=None):
+        fetched = self.responses[url]
+        if self.print_payloads:
+            # What the orchestrator printed for every upstream call
+            print(f"Making request to: {url}")
+            print(f"Response status: {fetched.status_code}")
+            print(f"Data received: {json.dumps(fetched.data, indent=2)}")
+        return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300, help="requests per mode and round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--documents", type=int, default=100, help="documents on the claim")
+    args = parser.parse_args()
+
+    os.environ["MCP_CACHE_SIZE"] = "0"
+    os.environ["CLAIMCENTER_COMPOSITE"] = "0"
+    orchestrator = load_service("mcp", "orchestrator")
+    load_service("claimcenter_api", "generate_data", name="generate_data")
+    from logs import flush_logging, setup_logging
+    from planner import plan
+    from steps import Fetched
+
+    resources = claimcenter_data(args.documents)
+    claimcenter = InMemoryClaimCenter({path: Fetched(200, data) for path, data in resources.items()})
+    orchestrator.claimcenter = claimcenter
+
+    respond = orchestrator.orchestrate_response
+    old_prints = False
+
+    def orchestrate_response(*response_args):
+        response = respond(*response_args)
+        if old_prints:
+            print("\n=== FINAL ORCHESTRATOR RESPONSE ===")
+            print(json.dumps(response, indent=2))
+        return response
+
+    orchestrator.orchestrate_response = orchestrate_response
+
+    def dispatch():
+        with orchestrator.app.test_request_context("/orchestrate", method="POST", json=BODY):
+            if old_prints:
+                print(f"Incoming request data: {json.dumps(BODY, indent=2)}")
+                print(f"Planned steps: {json.dumps(plan(BODY['prompt'], BODY['claim_id']), indent=2)}")
+            response = orchestrator.app.full_dispatch_request()
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    payload_bytes = sum(len(json.dumps(data)) for data in resources.values())
+    print(
+        f"{args.rounds} rounds x {args.requests} requests per mode,"
+        f" {args.documents} documents, {payload_bytes / 1024:.1f} KiB of upstream JSON per request"
+    )
+    samples = {label: [] for label in MODES}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(args.rounds):
+            for label, (level, sample_rate, prints) in MODES.items():
+                setup_logging(level=level, payload_sample_rate=sample_rate, stream=devnull)
+                old_prints = claimcenter.print_payloads = prints
+                dispatch()  # warm up
+                cpu = time.process_time()
+                for _ in range(args.requests):
+                    dispatch()
+                # Formatting happens on the listener thread; count it too
+                flush_logging()
+                samples[label].append((time.process_time() - cpu) / args.requests)
+
+    baseline = statistics.median(samples["baseline, logging off"])
+    old = statistics.median(samples["old print(json.dumps(indent=2))"]) - baseline
+    print(f"  {'mode':<33} {'CPU/request':>12} {'logging':>10} {'vs old prints':>14}")
+    for label, values in samples.items():
+        median = statistics.median(values)
+        logging_cost = median - baseline
+        print(
+            f"  {label:<33} {median * 1000:9.3f} ms {logging_cost * 1000:7.3f} ms"
+            f" {(logging_cost - old) * 1000:+11.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Sequential vs. concurrent step execution vs. a single composite request,
+against a delayed ClaimCenter.
+
+    python benchmarks/bench_orchestrator_concurrency.py --delay 0.05
+"""
+import argparse
+import os
+import statistics
+import time
+
+from stubs import Delayed, StubServer, load_service
+
+PROMPTS = [
+    "What are the coverages on this policy?",
+    "Show coverages, endorsements, documents and injuries for this claim",
+    "What is the premium and policy period, and which vehicle is insured?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.05, help="upstream latency (s)")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    claimcenter = load_service("claimcenter_api")
+    with StubServer(Delayed(claimcenter.app, args.delay)) as stub:
+        os.environ["CLAIMCENTER_BASE"] = stub.url
+        # Measure the executor, not the shared entity cache
+        os.environ["MCP_CACHE_SIZE"] = "0"
+        # The log queue's listener writes to the stdout it was set up with
+        os.environ["MCP_LOG_LEVEL"] = "CRITICAL"
+        orchestrator = load_service("mcp", "orchestrator")
+        from executor import StepExecutor
+
+        client = orchestrator.app.test_client()
+        concurrent = orchestrator.executor
+        # mode -> (executor, use the composite ?expand= request)
+        modes = {
+            "sequential": (StepExecutor(max_workers=1), False),
+            "concurrent": (concurrent, False),
+            "composite": (concurrent, True),
+        }
+        print(f"upstream delay {args.delay * 1000:.0f} ms, {args.iterations} iterations")
+        for prompt in PROMPTS:
+            print(f"\n{prompt}")
+            for mode, (executor, composite) in modes.items():
+                orchestrator.executor = executor
+                orchestrator.USE_COMPOSITE = composite
+                samples = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    resp = client.post(
+                        "/orchestrate", json={"prompt": prompt, "claim_id": "claim_1"}
+                    )
+                    samples.append(time.perf_counter() - start)
+                    assert resp.status_code == 200, resp.get_json()
+                print(
+                    f"  {mode:<11} median {statistics.median(samples) * 1000:7.1f} ms"
+                    f"  steps {len(resp.get_json()['results'])}"
+                    f"  upstream calls {resp.get_json()['metadata']['upstream_calls']}"
+                )
+
+
+if __name__ == "__main__":
+    main()
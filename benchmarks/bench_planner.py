@@ -0,0 +1,84 @@
+"""plan() throughput: compiled single-pass matcher vs. sequential substring
+checks, and the plan cache in front of it.
+
+    python benchmarks/bench_planner.py --intents 300
+"""
+import argparse
+import random
+import re
+import time
+
+from stubs import ROOT, load_service
+
+planner = load_service("mcp", "planner", name="planner")
+
+
+def linear_plan(intents, prompt):
+    """The old approach: every keyword of every intent checked in turn."""
+    prompt = prompt.lower()
+    actions = set()
+    for intent in intents:
+        if any(keyword in prompt for keyword in intent.keywords):
+            actions.add(intent.action)
+    return actions
+
+
+def synthetic_intents(count, rng):
+    words = ["claim", "policy", "loss", "vehicle", "injury", "document", "premium",
+             "coverage", "driver", "witness", "medical", "repair", "invoice", "status",
+             "reserve", "payment", "subrogation", "salvage", "fraud", "litigation"]
+    intents = list(planner.INTENTS)
+    for i in range(count - len(intents)):
+        keywords = tuple(
+            f"{rng.choice(words)} {rng.choice(words)} {i}" for _ in range(rng.randint(1, 4))
+        )
+        intents.append(planner.Intent(f"action_{i}", keywords, requires=("get_claim",)))
+    return intents
+
+
+def prompts():
+    with open(f"{ROOT}/demo-question-list.md") as f:
+        return [line.split(". ", 1)[1].strip() for line in f if re.match(r"\d+\. ", line)]
+
+
+def bench(fn, prompts, seconds):
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for prompt in prompts:
+            fn(prompt)
+        calls += len(prompts)
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intents", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    questions = prompts()
+    for label, intents in (
+        ("built-in table", list(planner.INTENTS)),
+        (f"{args.intents} intents", synthetic_intents(args.intents, rng)),
+    ):
+        start = time.perf_counter()
+        compiled = planner.Planner(intents)
+        compile_ms = (time.perf_counter() - start) * 1000
+        keywords = sum(len(intent.keywords) for intent in intents)
+        print(f"{label} ({keywords} keywords, compiled in {compile_ms:.1f} ms)")
+        linear = bench(lambda p: linear_plan(intents, p), questions, args.seconds)
+        single = bench(compiled.plan, questions, args.seconds)
+        print(f"  sequential substring checks {linear:10.0f} plans/s")
+        print(f"  compiled single pass        {single:10.0f} plans/s  ({single / linear:.1f}x)")
+
+    planner.plan_cache.clear()
+    cached = bench(lambda p: planner.plan(p, ""), questions, args.seconds)
+    print(f"built-in table through the plan cache {cached:10.0f} plans/s")
+    print(f"  {planner.plan_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
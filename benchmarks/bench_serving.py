@@ -0,0 +1,190 @@
+"""Throughput and latency of each service under the dev server vs. gunicorn.
+
+Starts every service as a real subprocess, once with the Werkzeug dev server
+(``SERVER_MODE=dev``, debugger and reloader off) and once under gunicorn with
+its ``gunicorn.conf.py``, and drives it with keep-alive clients spread over
+several processes:
+
+    python benchmarks/bench_serving.py --duration 10 --clients 32
+    python benchmarks/bench_serving.py --services claimcenter --workers 4 --threads 4
+
+The MCP runs point at a ClaimCenter served by gunicorn in both modes, so
+only the orchestrator's own serving differs. Load generator and servers
+share the machine; on few cores the client processes compete with the
+workers, so compare modes relative to each other.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from stubs import COMMON, ROOT, percentile
+
+SERVICES = {
+    "claimcenter": (
+        "claimcenter_api", "app", "GET", "/claims/claim_1?expand=policy,coverages", None,
+    ),
+    "claimlens": ("claimlens_api", "app", "POST", "/analyze", {"claim_id": "claim_1"}),
+    "mcp": (
+        "mcp", "orchestrator", "POST", "/orchestrate",
+        {"prompt": "Show claim details, coverages and the vehicle", "claim_id": "claim_1"},
+    ),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(service, mode, env_extra, workers=None, threads=None):
+    service_dir, module, *_ = SERVICES[service]
+    port = free_port()
+    env = dict(
+        os.environ, PORT=str(port), FLASK_DEBUG="0", MCP_LOG_LEVEL="WARNING",
+        PYTHONPATH=COMMON, **env_extra,
+    )
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    if threads:
+        env["GUNICORN_THREADS"] = str(threads)
+    if mode == "dev":
+        cmd = [sys.executable, f"{module}.py"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", f"{module}:app"]
+    proc = subprocess.Popen(
+        cmd, cwd=os.path.join(ROOT, service_dir), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/metrics", timeout=1).status_code == 200:
+                return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    stop(proc)
+    raise RuntimeError(f"{service} ({mode}) did not start")
+
+
+def stop(proc):
+    # SIGTERM: gunicorn's graceful shutdown
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def client_process(url, method, body, threads, duration, results):
+    """One load-generating process: ``threads`` keep-alive clients in a
+    closed loop until ``duration`` seconds have passed."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop():
+        session = requests.Session()
+        mine, failed = [], 0
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                break
+            try:
+                resp = session.request(method, url, json=body, timeout=30)
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((latencies, errors[0]))
+
+
+def load(url, method, body, clients, procs, duration):
+    procs = max(1, min(procs, clients))
+    results = multiprocessing.Queue()
+    started = [
+        multiprocessing.Process(
+            target=client_process,
+            args=(url, method, body, clients // procs + (i < clients % procs), duration, results),
+        )
+        for i in range(procs)
+    ]
+    for proc in started:
+        proc.start()
+    latencies, errors = [], 0
+    for _ in started:
+        samples, failed = results.get()
+        latencies.extend(samples)
+        errors += failed
+    for proc in started:
+        proc.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", default="claimcenter,claimlens,mcp")
+    parser.add_argument("--modes", default="dev,prod")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent connections")
+    parser.add_argument("--client-procs", type=int, default=4)
+    parser.add_argument("--workers", type=int, help="GUNICORN_WORKERS (default: per gunicorn.conf.py)")
+    parser.add_argument("--threads", type=int, help="GUNICORN_THREADS")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    args = parser.parse_args()
+
+    services = args.services.split(",")
+    upstream = None
+    if "mcp" in services:
+        upstream, upstream_url = start("claimcenter", "prod", {})
+    try:
+        print(
+            f"{args.clients} keep-alive clients in {args.client_procs} processes,"
+            f" {args.duration:.0f} s per run, {os.cpu_count()} CPUs"
+        )
+        for service in services:
+            _, _, method, path, body = SERVICES[service]
+            env = {"CLAIMCENTER_BASE": upstream_url} if service == "mcp" else {}
+            for mode in args.modes.split(","):
+                proc, url = start(service, mode, env, args.workers, args.threads)
+                try:
+                    load(url + path, method, body, args.clients, args.client_procs, args.warmup)
+                    latencies, errors = load(
+                        url + path, method, body, args.clients, args.client_procs, args.duration
+                    )
+                finally:
+                    stop(proc)
+                print(
+                    f"  {service:<12} {mode:<5} {len(latencies) / args.duration:8.0f} req/s"
+                    f"  p50 {percentile(latencies, 50) * 1000:7.1f} ms"
+                    f"  p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+                    f"  errors {errors}"
+                )
+    finally:
+        if upstream is not None:
+            stop(upstream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Chat UI rerun time vs. chat history length.
+
+Runs the Streamlit script headless (streamlit.testing AppTest) with a chat
+history of each length already in the session and times a rerun. "all"
+renders every message on every rerun, as the UI did before; "windowed" is
+agentic_chat_ui/app.py, which emits one page of pre-rendered messages:
+
+    python benchmarks/bench_ui_render.py --lengths 10,100,1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from stubs import ROOT
+
+UI = os.path.join(ROOT, "agentic_chat_ui")
+sys.path.insert(0, UI)
+import renderer  # noqa: E402
+
+# The history loop of the UI before pre-rendered, windowed history
+RENDER_ALL = '''
+import streamlit as st
+import renderer
+
+st.title("Claims Agentic Chat")
+st.text_input("Ask a question about the claim", key="user_input")
+st.text_input("Claim ID", value="claim_1", key="claim_id_input")
+st.button("Submit")
+for msg in st.session_state.chat_history:
+    st.markdown(renderer.bubble(msg["role"], msg["content"]), unsafe_allow_html=True)
+'''
+
+STEPS = [
+    {"step": "Claim retrieved", "data": {
+        "claim_id": "claim_1", "claim_number": "CLM-1", "description": "Rear-end collision",
+        "loss_date": "2025-01-01", "status": "Open", "policy_id": "policy_auto_1",
+        "accident_details": {
+            "location": {"street": "1 Main St", "city": "Springfield", "state": "IL", "zip_code": "62701"},
+            "damage_estimate": 4200,
+            "injuries": [{"name": "Driver", "type": "Whiplash", "severity": "Minor"}],
+        },
+    }},
+    {"step": "Policy coverages fetched", "data": ["Collision", "Comprehensive", "Liability"]},
+    {"step": "Policy endorsements fetched", "data": [{"code": "END-1", "title": "Rental reimbursement"}]},
+]
+
+
+def history(length):
+    answer = renderer.MessageBuilder()
+    for index, entry in enumerate(STEPS):
+        answer.add(index, entry)
+    markdown = answer.markdown()
+    return [
+        renderer.message("user", "Show claim, coverages and endorsements")
+        if i % 2 == 0 else renderer.message("ai", markdown)
+        for i in range(length)
+    ]
+
+
+def rerun_time(app, length, reruns):
+    app.session_state["chat_history"] = history(length)
+    app.run(timeout=60)
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run(timeout=60)
+        samples.append(time.perf_counter() - start)
+    assert not app.exception, app.exception
+    return statistics.median(samples), len(app.markdown)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", default="10,100,500,1000")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    # app.py reads styles.css relative to its directory
+    os.chdir(UI)
+    print(f"{'messages':>8}  {'all ms':>8}  {'windowed ms':>11}  {'elements all/windowed':>21}")
+    for length in map(int, args.lengths.split(",")):
+        full, full_elements = rerun_time(AppTest.from_string(RENDER_ALL), length, args.reruns)
+        windowed, windowed_elements = rerun_time(
+            AppTest.from_file(os.path.join(UI, "app.py")), length, args.reruns
+        )
+        print(
+            f"{length:8d}  {full * 1000:8.1f}  {windowed * 1000:11.1f}"
+            f"  {full_elements:>10d}/{windowed_elements:<10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-call requests.get vs. the pooled UpstreamClient against a local stub.
+
+Reports connections opened, throughput and p50/p99 latency, then shows the
+circuit breaker failing fast against an upstream that is down.
+
+    python benchmarks/bench_upstream_pooling.py --threads 8 --requests 200
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from stubs import Delayed, StubServer, load_service, percentile
+
+
+class ConnectionCounter:
+    """WSGI middleware counting distinct client connections (source ports)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.peers = set()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.peers.add((environ.get("REMOTE_ADDR"), environ.get("REMOTE_PORT")))
+        return self.app(environ, start_response)
+
+
+def run(get, url, threads, total):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        get(url)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(one, range(total)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    load_service("mcp", "steps", name="steps")
+    from upstream import CircuitBreaker, UpstreamClient, UpstreamError
+
+    claimcenter = load_service("claimcenter_api")
+    counter = ConnectionCounter(Delayed(claimcenter.app, args.delay))
+    with StubServer(counter) as stub:
+        url = f"{stub.url}/claims/claim_1"
+        pooled = UpstreamClient("ClaimCenter", stub.url, pool_size=args.threads)
+        modes = {
+            "requests.get": lambda u: requests.get(u).json(),
+            "pooled client": pooled.get,
+        }
+        print(f"{args.requests} GETs over {args.threads} threads, {args.delay * 1000:.0f} ms stub delay")
+        for mode, get in modes.items():
+            counter.peers.clear()
+            elapsed, latencies = run(get, url, args.threads, args.requests)
+            print(
+                f"  {mode:<14} connections {len(counter.peers):4d}"
+                f"  {args.requests / elapsed:7.0f} req/s"
+                f"  p50 {percentile(latencies, 50) * 1000:6.1f} ms"
+                f"  p99 {percentile(latencies, 99) * 1000:6.1f} ms"
+            )
+
+    down = UpstreamClient(
+        "ClaimCenter", "http://127.0.0.1:9", retries=1,
+        breaker=CircuitBreaker(threshold=3, reset_timeout=30),
+    )
+    print("\nupstream down (breaker threshold 3):")
+    for i in range(5):
+        start = time.perf_counter()
+        try:
+            down.get(down.url("/claims/claim_1"))
+        except UpstreamError as e:
+            outcome = type(e).__name__
+        print(f"  call {i + 1}: {outcome:<17} {(time.perf_counter() - start) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""End-to-end load test of the whole stack, in one process.
+
+``run`` starts ClaimCenter (on a synthetic book generated with
+claimcenter_api/generate_data.py), ClaimLens and the MCP orchestrator on
+local keep-alive servers, with injected latency in front of each upstream.
+``--concurrency`` clients then replay the prompts of demo-question-list.md
+against random claims for ``--duration`` seconds. It reports throughput,
+latency percentiles and upstream call counts, and ``--output`` saves them as
+JSON tagged with the git commit:
+
+    python benchmarks/harness.py run --duration 20 --output before.json
+    python benchmarks/harness.py run --duration 20 --output after.json \\
+        --env CLAIMCENTER_COMPOSITE=0
+    python benchmarks/harness.py compare before.json after.json
+
+``compare`` prints the change of each metric and exits with status 1 when
+one regressed by more than ``--threshold``. Servers and clients share one
+interpreter, so absolute numbers are lower than a deployment's. Compare
+runs made on the same machine with the same settings.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from stubs import ROOT, Delayed, StubServer, load_service, percentile
+
+UPSTREAM_FIELDS = ("upstream_calls", "upstream_calls_saved", "cache_hits", "revalidated")
+
+
+class CallCounter:
+    """WSGI middleware counting requests by response status."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.statuses = Counter()
+
+    def __call__(self, environ, start_response):
+        def counting_start_response(status, headers, exc_info=None):
+            with self.lock:
+                self.statuses[status.split()[0]] += 1
+            return start_response(status, headers, exc_info)
+
+        return self.app(environ, counting_start_response)
+
+    def total(self):
+        with self.lock:
+            return sum(self.statuses.values())
+
+
+def demo_prompts():
+    with open(os.path.join(ROOT, "demo-question-list.md")) as f:
+        return [line.split(". ", 1)[1].strip() for line in f if re.match(r"\d+\. ", line)]
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "-uno"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def drive(url, prompts, claim_ids, concurrency, duration, timeout, seed):
+    """Closed-loop clients; returns the (prompt, seconds, status, metadata)
+    of every request and the elapsed time."""
+    records = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(i):
+        rng = random.Random(seed + i)
+        local = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                prompt = rng.choice(prompts)
+                body = {"prompt": prompt, "claim_id": rng.choice(claim_ids)}
+                sent = time.perf_counter()
+                try:
+                    resp = session.post(f"{url}/orchestrate", json=body, timeout=timeout)
+                    status, metadata = resp.status_code, resp.json().get("metadata", {})
+                except (requests.RequestException, ValueError):
+                    status, metadata = "error", {}
+                local.append((prompt, time.perf_counter() - sent, status, metadata))
+        with lock:
+            records.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+
+def latency_ms(samples):
+    return {
+        "p50": round(percentile(samples, 50) * 1000, 2),
+        "p90": round(percentile(samples, 90) * 1000, 2),
+        "p99": round(percentile(samples, 99) * 1000, 2),
+        "max": round(max(samples, default=0.0) * 1000, 2),
+        "mean": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def error_rate(errors, requests):
+    return errors / requests if requests else 0.0
+
+
+def summarize(records, elapsed, claimcenter, claimlens):
+    ok = [r for r in records if r[2] == 200]
+    upstream = {field: sum(r[3].get(field, 0) for r in ok) for field in UPSTREAM_FIELDS}
+    by_prompt = {}
+    for prompt, seconds, _, _ in ok:
+        by_prompt.setdefault(prompt, []).append(seconds)
+    return {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "error_rate": round(error_rate(len(records) - len(ok), len(records)), 4),
+        "statuses": dict(Counter(str(r[2]) for r in records)),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": latency_ms([r[1] for r in ok]),
+        "upstream": dict(
+            upstream,
+            claimcenter_requests=claimcenter.total(),
+            claimlens_requests=claimlens.total(),
+            claimcenter_requests_per_orchestration=round(claimcenter.total() / len(ok), 3) if ok else 0.0,
+        ),
+        "prompts": {
+            prompt: {"count": len(samples), **latency_ms(samples)}
+            for prompt, samples in sorted(by_prompt.items())
+        },
+    }
+
+
+def print_report(result):
+    latency = result["latency_ms"]
+    upstream = result["upstream"]
+    print(
+        f"{result['requests']} requests in {result['elapsed_s']:.1f} s,"
+        f" {result['throughput_rps']:.1f} req/s, {result['errors']} errors"
+        f" ({result['error_rate']:.1%}) {result['statuses']}"
+    )
+    print(
+        f"latency ms  p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}"
+        f"  p99 {latency['p99']:.1f}  max {latency['max']:.1f}"
+    )
+    print(
+        f"upstream    ClaimCenter {upstream['claimcenter_requests']}"
+        f" ({upstream['claimcenter_requests_per_orchestration']:.2f}/orchestration),"
+        f" ClaimLens {upstream['claimlens_requests']}; MCP saved {upstream['upstream_calls_saved']},"
+        f" cache hits {upstream['cache_hits']}, revalidated {upstream['revalidated']}"
+    )
+    print("\nper prompt (p50 / p99 ms)")
+    for prompt, stats in result["prompts"].items():
+        print(f"  {stats['p50']:8.1f} {stats['p99']:8.1f}  {stats['count']:6d}  {prompt}")
+
+
+def run(args):
+    prompts = demo_prompts()
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    with tempfile.TemporaryDirectory() as data_dir:
+        if args.claims:
+            subprocess.run(
+                [sys.executable, os.path.join(ROOT, "claimcenter_api", "generate_data.py"),
+                 data_dir, "--claims", str(args.claims), "--seed", str(args.seed)],
+                check=True, stdout=subprocess.DEVNULL,
+            )
+            os.environ["CLAIMCENTER_DATA_DIR"] = data_dir
+            claim_ids = [f"claim_{i}" for i in range(min(args.claims, args.claim_pool))]
+        else:
+            claim_ids = ["claim_1", "claim_2"]
+        os.environ["CLAIMLENS_SECONDS_PER_DOCUMENT"] = str(args.analysis_seconds)
+        os.environ.update(extra_env)
+
+        claimcenter = CallCounter(Delayed(load_service("claimcenter_api").app, args.claimcenter_delay))
+        claimlens = CallCounter(Delayed(load_service("claimlens_api").app, args.claimlens_delay))
+        with StubServer(claimcenter) as claimcenter_server, StubServer(claimlens) as claimlens_server:
+            os.environ.update(
+                CLAIMCENTER_BASE=claimcenter_server.url,
+                CLAIMLENS_BASE=claimlens_server.url,
+                # Failed orchestrations are counted, not logged
+                MCP_LOG_LEVEL="CRITICAL",
+            )
+            os.environ.update(extra_env)
+            mcp = load_service("mcp", "orchestrator")
+            with StubServer(mcp.app) as mcp_server:
+                if args.warmup:
+                    drive(mcp_server.url, prompts, claim_ids, args.concurrency,
+                          args.warmup, args.timeout, args.seed + 10000)
+                    claimcenter.statuses.clear()
+                    claimlens.statuses.clear()
+                records, elapsed = drive(
+                    mcp_server.url, prompts, claim_ids, args.concurrency,
+                    args.duration, args.timeout, args.seed,
+                )
+
+    result = dict(
+        git_commit(),
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        config=dict(vars(args), env=extra_env, func=None),
+        **summarize(records, elapsed, claimcenter, claimlens),
+    )
+    result["config"].pop("func")
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+# metric -> (path in the result, True if higher is better)
+COMPARED = {
+    "throughput req/s": (("throughput_rps",), True),
+    "p50 ms": (("latency_ms", "p50"), False),
+    "p90 ms": (("latency_ms", "p90"), False),
+    "p99 ms": (("latency_ms", "p99"), False),
+    "ClaimCenter calls/orchestration": (("upstream", "claimcenter_requests_per_orchestration"), False),
+}
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base.get('commit')} ({base.get('timestamp')})  new {new.get('commit')} ({new.get('timestamp')})")
+    settings = [{k: v for k, v in run["config"].items() if k != "output"} for run in (base, new)]
+    if settings[0] != settings[1]:
+        print("warning: the runs used different settings")
+    regressions = []
+    for name, (path, higher_is_better) in COMPARED.items():
+        before, after = base, new
+        for key in path:
+            before, after = before[key], after[key]
+        change = (after - before) / before if before else (0.0 if after == before else float("inf"))
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > args.threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"  {name:<33} {before:10.2f} -> {after:10.2f}  {change:+8.1%}{flag}")
+    # Some demo prompts fail every time (a vehicle question about a claim
+    # without an auto policy is a 500), so a few percent of requests are
+    # errors in every run. Their count varies with the prompt mix, so the
+    # rate is compared by absolute difference rather than relative change
+    before, after = (error_rate(run["errors"], run["requests"]) for run in (base, new))
+    flag = "  REGRESSION" if after - before > args.error_tolerance else ""
+    if flag:
+        regressions.append("error rate")
+    print(f"  {'error rate':<33} {before:10.2%} -> {after:10.2%}  {(after - before) * 100:+7.2f}pp{flag}")
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="load-test the stack")
+    run_parser.add_argument("--claims", type=int, default=1000, help="generated claims; 0 uses data/")
+    run_parser.add_argument("--claim-pool", type=int, default=200, help="distinct claims the prompts ask about")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--duration", type=float, default=10.0)
+    run_parser.add_argument("--warmup", type=float, default=1.0, help="seconds of unrecorded load first")
+    run_parser.add_argument("--claimcenter-delay", type=float, default=0.01, help="ClaimCenter latency (s)")
+    run_parser.add_argument("--claimlens-delay", type=float, default=0.01, help="ClaimLens latency (s)")
+    run_parser.add_argument("--analysis-seconds", type=float, default=0.05, help="ClaimLens time per document")
+    run_parser.add_argument("--timeout", type=float, default=30.0)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                            help="extra service setting, e.g. MCP_CACHE_SIZE=0")
+    run_parser.add_argument("--output", help="write results as JSON")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression")
+    compare_parser.add_argument("--error-tolerance", type=float, default=0.01,
+                                help="allowed rise of the error rate, as a fraction of requests")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Helpers for running the services in-process against local stubs.
+
+The services are separate Docker build contexts with flat imports, so each
+one is loaded from its own directory under a unique module name.
+"""
+import importlib.util
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules shared by the services (telemetry)
+COMMON = os.path.join(ROOT, "common")
+
+
+def load_service(service_dir, module="app", name=None):
+    """Import ``<service_dir>/<module>.py`` with the service dir (and
+    common/) on sys.path."""
+    path = os.path.join(ROOT, service_dir)
+    for directory in (COMMON, path):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    name = name or f"{service_dir}_{module}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(path, f"{module}.py"))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class Delayed:
+    """WSGI middleware sleeping ``delay`` seconds before every request."""
+
+    def __init__(self, app, delay):
+        self.app = app
+        self.delay = delay
+
+    def __call__(self, environ, start_response):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.app(environ, start_response)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 WSGI handler that keeps connections open.
+
+    Werkzeug's dev server always sends ``Connection: close``, which would
+    hide the effect of client-side connection pooling. Responses without a
+    Content-Length are sent chunked, so streaming endpoints stream.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        path, _, query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        environ = {
+            "REQUEST_METHOD": self.command,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.server.server_name,
+            "SERVER_PORT": str(self.server.server_port),
+            "SERVER_PROTOCOL": self.request_version,
+            "REMOTE_ADDR": self.client_address[0],
+            "REMOTE_PORT": str(self.client_address[1]),
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(length),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(self.rfile.read(length)),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for key, value in self.headers.items():
+            key = key.upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[f"HTTP_{key}"] = value
+
+        status_headers = []
+
+        def start_response(status, headers, exc_info=None):
+            status_headers[:] = [status, headers]
+
+        body = self.server.app(environ, start_response)
+        try:
+            status, headers = status_headers
+            code = int(status.split()[0])
+            self.send_response(code, status.split(" ", 1)[1])
+            # 204 and 304 responses never have a body, chunked or not
+            bodiless = code in (204, 304)
+            chunked = not bodiless and not any(k.lower() == "content-length" for k, _ in headers)
+            for key, value in headers:
+                self.send_header(key, value)
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for data in body:
+                if not data or bodiless:
+                    continue
+                if chunked:
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                else:
+                    self.wfile.write(data)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """Threaded keep-alive WSGI server on an ephemeral local port."""
+
+    def __init__(self, app, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), _KeepAliveHandler)
+        self.server.daemon_threads = True
+        self.server.app = app
+        self.url = f"http://{host}:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -1,45 +1,169 @@
-from flask import Flask, jsonify
-import json
+from flask import Flask, jsonify, request
+from conditional import ConditionalResponder
+from storage import open_store
 import os
+import telemetry
 
 app = Flask(__name__)
-DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# Per-route latency histograms at /metrics; joins the caller's trace
+telemetry.init_app(app, "claimcenter")
 
-def load_json(file_name):
-    with open(os.path.join(DATA_DIR, file_name)) as f:
-        return json.load(f)
+# JSON files or an indexed SQLite database (CLAIMCENTER_STORAGE); both open
+# in constant time and load lazily
+store = open_store()
+# Set by gunicorn.conf.py: the preloading master loads everything before
+# forking, so workers share one copy of the data
+if os.environ.get("CLAIMCENTER_EAGER_LOAD") == "1":
+    store.load_all()
 
-# Load all data once at startup
-claims = load_json("claims.json")
-policies = load_json("policies.json")
-documents = load_json("documents.json")
-injuries = load_json("injuries.json")
-endorsements = load_json("endorsements.json")
-coverages = load_json("coverages.json")
+# Serialized bodies with ETags, served as 304s on If-None-Match and
+# gzip-compressed from CLAIMCENTER_GZIP_MIN_BYTES; at most
+# CLAIMCENTER_RESPONSE_CACHE_BYTES of bodies and gzip copies are kept
+responses = ConditionalResponder(
+    last_modified=store.last_modified,
+    maxbytes=int(os.environ.get("CLAIMCENTER_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024))),
+    gzip_min_size=int(os.environ.get("CLAIMCENTER_GZIP_MIN_BYTES", "1024")),
+)
 
+CLAIM_EXPANSIONS = ("policy", "coverages", "endorsements", "documents", "injuries")
+POLICY_EXPANSIONS = ("coverages", "endorsements")
+
+
+def requested_expansions(allowed):
+    expand = [e.strip() for e in request.args.get("expand", "").split(",") if e.strip()]
+    unknown = [e for e in expand if e not in allowed]
+    return expand, unknown
+
+
+def requested_ids():
+    return [i.strip() for i in request.args.get("ids", "").split(",") if i.strip()]
+
+
+def normalized(values):
+    """Response cache key for a list parameter: responses are serialized
+    with sorted keys, so order and duplicates don't change them."""
+    return tuple(sorted(set(values)))
+
+
+def search_filters():
+    return {
+        "status": request.args.get("status"),
+        "lob": request.args.get("lob"),
+        "policy_id": request.args.get("policy_id"),
+        "loss_date_from": request.args.get("loss_date_from"),
+        "loss_date_to": request.args.get("loss_date_to"),
+        # SQLite reads a negative LIMIT as "no limit"
+        "limit": min(max(request.args.get("limit", 100, type=int), 1), 1000),
+    }
+
+
+def expand_policy(policy_id, expand):
+    policy = store.policy(policy_id) or {"error": "Policy not found"}
+    if not expand or "error" in policy:
+        return policy
+    expanded = {}
+    if "coverages" in expand:
+        expanded["coverages"] = store.coverages(policy_id)
+    if "endorsements" in expand:
+        expanded["endorsements"] = store.endorsements(policy_id)
+    return {**policy, "expanded": expanded}
+
+
+def expand_claim(claim_id, expand):
+    claim = store.claim(claim_id) or {"error": "Claim not found"}
+    if not expand or "error" in claim:
+        return claim
+    policy_id = claim.get("policy_id", "")
+    expanded = {}
+    if "policy" in expand:
+        expanded["policy"] = store.policy(policy_id) or {"error": "Policy not found"}
+    if "coverages" in expand:
+        expanded["coverages"] = store.coverages(policy_id)
+    if "endorsements" in expand:
+        expanded["endorsements"] = store.endorsements(policy_id)
+    if "documents" in expand:
+        expanded["documents"] = store.documents(claim_id)
+    if "injuries" in expand:
+        expanded["injuries"] = store.injuries(claim_id)
+    return {**claim, "expanded": expanded}
+
+
+def unknown_expansions(unknown, allowed):
+    return jsonify({
+        "error": f"Unknown expand value(s): {', '.join(unknown)}",
+        "allowed": list(allowed),
+    }), 400
+
+
+# ?expand=policy,coverages,endorsements,documents,injuries returns the claim
+# with those resources under "expanded", in a single round-trip
 @app.route("/claims/<claim_id>")
 def get_claim(claim_id):
-    return jsonify(claims.get(claim_id, {"error": "Claim not found"}))
+    expand, unknown = requested_expansions(CLAIM_EXPANSIONS)
+    if unknown:
+        return unknown_expansions(unknown, CLAIM_EXPANSIONS)
+    return responses.respond(lambda: expand_claim(claim_id, expand), {"expand": normalized(expand)})
+
+# Multi-get: /claims?ids=claim_1,claim_2[&expand=...]
+# Search: /claims?status=Open&lob=Auto&policy_id=...&loss_date_from=2025-01-01&loss_date_to=...&limit=100
+@app.route("/claims")
+def get_claims():
+    expand, unknown = requested_expansions(CLAIM_EXPANSIONS)
+    if unknown:
+        return unknown_expansions(unknown, CLAIM_EXPANSIONS)
+
+    ids = normalized(requested_ids())
+    filters = {} if ids else search_filters()
+
+    def build():
+        claim_ids = ids or [claim["claim_id"] for claim in store.search_claims(**filters)]
+        return {"claims": {cid: expand_claim(cid, expand) for cid in claim_ids}}
+
+    return responses.respond(build, {"ids": ids, "expand": normalized(expand), **filters})
 
 @app.route("/claims/<claim_id>/documents")
 def get_documents(claim_id):
-    return jsonify(documents.get(claim_id, []))
+    return responses.respond(lambda: store.documents(claim_id))
 
 @app.route("/claims/<claim_id>/injuries")
 def get_injuries(claim_id):
-    return jsonify(injuries.get(claim_id, []))
+    return responses.respond(lambda: store.injuries(claim_id))
 
 @app.route("/policies/<policy_id>")
 def get_policy(policy_id):
-    return jsonify(policies.get(policy_id, {"error": "Policy not found"}))
+    expand, unknown = requested_expansions(POLICY_EXPANSIONS)
+    if unknown:
+        return unknown_expansions(unknown, POLICY_EXPANSIONS)
+    return responses.respond(lambda: expand_policy(policy_id, expand), {"expand": normalized(expand)})
+
+# Multi-get: /policies?ids=policy_auto_1,policy_gl_1[&expand=coverages,endorsements]
+@app.route("/policies")
+def get_policies():
+    expand, unknown = requested_expansions(POLICY_EXPANSIONS)
+    if unknown:
+        return unknown_expansions(unknown, POLICY_EXPANSIONS)
+    ids = normalized(requested_ids())
+    return responses.respond(
+        lambda: {"policies": {pid: expand_policy(pid, expand) for pid in ids}},
+        {"ids": ids, "expand": normalized(expand)},
+    )
 
 @app.route("/policies/<policy_id>/coverages")
 def get_coverages(policy_id):
-    return jsonify(coverages.get(policy_id, []))
+    return responses.respond(lambda: store.coverages(policy_id))
 
 @app.route("/policies/<policy_id>/endorsements")
 def get_endorsements(policy_id):
-    return jsonify(endorsements.get(policy_id, []))
+    return responses.respond(lambda: store.endorsements(policy_id))
+
+@app.route("/responses/stats")
+def response_stats():
+    return jsonify(responses.stats())
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080,debug=True)
+    # Werkzeug dev server (SERVER_MODE=dev); production runs under gunicorn
+    app.run(
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8080")),
+        debug=os.environ.get("FLASK_DEBUG", "1") == "1",
+    )
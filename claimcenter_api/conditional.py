@@ -0,0 +1,132 @@
+"""Cached, conditional and compressed JSON responses.
+
+ClaimCenter data does not change while the service runs, so each
+resource's JSON body is serialized once and kept with its strong ETag (and,
+on first request, a gzip copy). Later requests for it are served from that
+entry: a matching ``If-None-Match`` (or ``If-Modified-Since``) gets a
+bodiless 304, and clients accepting gzip get the compressed bytes.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, jsonify, request
+from werkzeug.http import http_date
+
+
+class Representation:
+    """Serialized body of one resource, with its ETags and gzip copy."""
+
+    __slots__ = ("body", "etag", "gzip_etag", "gzipped")
+
+    def __init__(self, body):
+        self.body = body
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # Strong ETags differ per encoding
+        self.etag = digest
+        self.gzip_etag = f"{digest}-gzip"
+        self.gzipped = None
+
+    def size(self):
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class ConditionalResponder:
+    """Serves ``build()``'s JSON for the current request from an LRU of
+    Representations holding at most ``maxbytes`` of bodies and gzip copies.
+
+    Entries are keyed by path and the normalized ``params`` passed to
+    respond(), so unknown query parameters or a different order of the same
+    ones don't add entries. Bodies of at least ``gzip_min_size`` bytes are
+    sent gzip-compressed to clients that accept it. ``last_modified`` (epoch
+    seconds) is sent as Last-Modified on every response.
+    """
+
+    def __init__(self, last_modified=None, maxbytes=64 * 1024 * 1024, gzip_min_size=1024, gzip_level=6):
+        self.last_modified = last_modified
+        self.maxbytes = maxbytes
+        self.gzip_min_size = gzip_min_size
+        self.gzip_level = gzip_level
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "not_modified": 0, "gzipped": 0}
+
+    def _evict(self):
+        while self._bytes > self.maxbytes:
+            _, rep = self._entries.popitem(last=False)
+            self._bytes -= rep.size()
+
+    def _representation(self, key, build):
+        with self._lock:
+            rep = self._entries.get(key)
+            if rep is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return rep
+            self._counters["misses"] += 1
+        rep = Representation(jsonify(build()).get_data())
+        if rep.size() <= self.maxbytes:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old.size()
+                self._entries[key] = rep
+                self._bytes += rep.size()
+                self._evict()
+        return rep
+
+    def _gzipped(self, key, rep):
+        if rep.gzipped is None:
+            # Racing threads compress the same bytes; the first copy is kept
+            data = gzip.compress(rep.body, compresslevel=self.gzip_level, mtime=0)
+            with self._lock:
+                if rep.gzipped is None:
+                    rep.gzipped = data
+                    if self._entries.get(key) is rep:
+                        self._bytes += len(data)
+                        self._evict()
+        return rep.gzipped
+
+    def _not_modified(self, rep):
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(rep.etag) or \
+                request.if_none_match.contains_weak(rep.gzip_etag)
+        since = request.if_modified_since
+        return since is not None and self.last_modified is not None and \
+            int(self.last_modified) <= since.timestamp()
+
+    def respond(self, build, params=None):
+        """Response for the current request. ``params`` ({name: hashable
+        value}) are the normalized query parameters ``build`` depends on;
+        other parameters are ignored."""
+        key = (request.path, tuple(sorted((params or {}).items())))
+        rep = self._representation(key, build)
+        compress = (
+            len(rep.body) >= self.gzip_min_size
+            and request.accept_encodings.quality("gzip") > 0
+        )
+        headers = {
+            "ETag": f'"{rep.gzip_etag if compress else rep.etag}"',
+            "Vary": "Accept-Encoding",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+
+        if self._not_modified(rep):
+            with self._lock:
+                self._counters["not_modified"] += 1
+            return Response(status=304, headers=headers)
+        if compress:
+            with self._lock:
+                self._counters["gzipped"] += 1
+            headers["Content-Encoding"] = "gzip"
+            return Response(self._gzipped(key, rep), mimetype="application/json", headers=headers)
+        return Response(rep.body, mimetype="application/json", headers=headers)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counters, size=len(self._entries), bytes=self._bytes, maxbytes=self.maxbytes,
+            )
@@ -0,0 +1,156 @@
+"""Generate a synthetic book of business shaped like the files in data/.
+
+    python generate_data.py out_dir --claims 1000000 [--claims-per-policy 2] [--seed 1]
+
+Files are written entry by entry, so generating a million claims does not
+need them in memory.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+
+LOBS = {
+    "Auto": {
+        "coverages": ["Bodily Injury", "Property Damage", "Collision", "Comprehensive", "Uninsured Motorist"],
+        "endorsements": [("CA0001", "Named Driver Exclusion"), ("CA1234", "Rental Reimbursement"), ("CA2020", "Roadside Assistance")],
+        "documents": ["police_report.pdf", "medical_summary.pdf", "repair_estimate.pdf", "photos.zip"],
+        "descriptions": ["Rear-end collision with injury", "Side-swipe on highway", "Parking lot collision", "Hail damage"],
+        "injury_types": ["Whiplash", "Concussion", "Broken Arm", "Bruising"],
+        "body_parts": ["Neck", "Head", "Arm", "Back"],
+    },
+    "General Liability": {
+        "coverages": ["General Liability", "Premises Liability", "Products Liability"],
+        "endorsements": [("GL1234", "Additional Insured – Vendors"), ("GL9999", "Slip and Fall Exclusion")],
+        "documents": ["incident_report.pdf", "liability_notice.pdf", "witness_statement.pdf"],
+        "descriptions": ["Slip and fall at retail store", "Product defect injury", "Falling signage"],
+        "injury_types": ["Ankle Sprain", "Hip Fracture", "Laceration"],
+        "body_parts": ["Ankle", "Hip", "Hand", "Knee"],
+    },
+}
+STATUSES = ["Open", "Open", "Closed", "Pending", "Reopened"]
+SEVERITIES = ["Minor", "Moderate", "Severe"]
+CITIES = [("Springfield", "IL", "62701"), ("Metropolis", "NY", "10001"), ("Riverside", "CA", "92501"), ("Franklin", "TN", "37064")]
+NAMES = ["John Smith", "Jane Doe", "Maria Garcia", "Wei Chen", "ABC Retail Inc.", "Acme Corp."]
+
+
+def _address(rng):
+    city, state, zip_code = rng.choice(CITIES)
+    return {"street": f"{rng.randint(1, 999)} Main St", "city": city, "state": state, "zip_code": zip_code}
+
+
+def _date(rng, start, days):
+    return (start + datetime.timedelta(days=rng.randrange(days))).isoformat()
+
+
+def generate(claims, claims_per_policy=2, seed=1):
+    """Yield (file name, key, value) entries, grouped by file."""
+    rng = random.Random(seed)
+    n_policies = max(1, claims // claims_per_policy)
+    policy_lobs = [rng.choice(list(LOBS)) for _ in range(n_policies)]
+
+    for i, lob in enumerate(policy_lobs):
+        effective = _date(rng, datetime.date(2023, 1, 1), 730)
+        policy = {
+            "policy_id": f"policy_{i}",
+            "policy_number": f"{'AUTO' if lob == 'Auto' else 'GL'}-{effective[:4]}-POL{i:07d}",
+            "lob": lob,
+            "policyholder_name": rng.choice(NAMES),
+            "address": _address(rng),
+            "premium": round(rng.uniform(500, 5000), 2),
+            "effective_date": effective,
+            "expiration_date": f"{int(effective[:4]) + 1}{effective[4:]}",
+            "status": rng.choice(["In-Force", "In-Force", "Expired", "Cancelled"]),
+            "claim_id": f"claim_{i}",
+        }
+        if lob == "Auto":
+            policy["vehicle_details"] = {
+                "make": rng.choice(["Toyota", "Honda", "Ford", "Tesla"]),
+                "model": rng.choice(["Camry", "Civic", "F-150", "Model 3"]),
+                "year": rng.randint(2005, 2025),
+                "vin": "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(17)),
+            }
+        yield "policies", policy["policy_id"], policy
+
+    for i, lob in enumerate(policy_lobs):
+        shapes = LOBS[lob]
+        yield "coverages", f"policy_{i}", rng.sample(shapes["coverages"], rng.randint(1, len(shapes["coverages"])))
+        yield "endorsements", f"policy_{i}", [
+            {"code": code, "title": title}
+            for code, title in rng.sample(shapes["endorsements"], rng.randint(0, len(shapes["endorsements"])))
+        ]
+
+    claim_lobs = []
+    for i in range(claims):
+        policy_index = i % n_policies
+        lob = policy_lobs[policy_index]
+        claim_lobs.append(lob)
+        shapes = LOBS[lob]
+        yield "claims", f"claim_{i}", {
+            "claim_id": f"claim_{i}",
+            "claim_number": f"{'AUTO' if lob == 'Auto' else 'GL'}-2025-{i:07d}",
+            "description": rng.choice(shapes["descriptions"]),
+            "loss_date": _date(rng, datetime.date(2024, 1, 1), 730),
+            "status": rng.choice(STATUSES),
+            "send_to_claim_lens": rng.random() < 0.5,
+            "policy_id": f"policy_{policy_index}",
+            "accident_details": {
+                "location": _address(rng),
+                "injuries": [
+                    {"name": rng.choice(NAMES), "type": rng.choice(shapes["injury_types"]), "severity": rng.choice(SEVERITIES)}
+                    for _ in range(rng.randint(0, 2))
+                ],
+                "damage_estimate": round(rng.uniform(500, 50000), 2),
+            },
+        }
+
+    for i, lob in enumerate(claim_lobs):
+        shapes = LOBS[lob]
+        yield "documents", f"claim_{i}", [
+            {"document_id": f"doc_{i}_{n}", "filename": name, "content_type": "application/pdf"}
+            for n, name in enumerate(rng.sample(shapes["documents"], rng.randint(1, 3)))
+        ]
+        yield "injuries", f"claim_{i}", [
+            {
+                "incident_id": f"incident_{i}_{n}",
+                "description": f"{rng.choice(shapes['injury_types'])} from {rng.choice(shapes['descriptions']).lower()}",
+                "body_parts": rng.sample(shapes["body_parts"], rng.randint(1, 2)),
+                "severity": rng.choice(SEVERITIES),
+            }
+            for n in range(rng.randint(0, 2))
+        ]
+
+
+def write(out_dir, entries):
+    """Stream entries into one JSON object per file."""
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    try:
+        for name, key, value in entries:
+            f = files.get(name)
+            if f is None:
+                f = files[name] = open(os.path.join(out_dir, f"{name}.json"), "w")
+                f.write("{\n")
+            else:
+                f.write(",\n")
+            f.write(f"{json.dumps(key)}: {json.dumps(value)}")
+    finally:
+        for f in files.values():
+            f.write("\n}\n")
+            f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--claims", type=int, default=10000)
+    parser.add_argument("--claims-per-policy", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    write(args.out_dir, generate(args.claims, args.claims_per_policy, args.seed))
+    print(f"Wrote {args.claims} claims to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Gunicorn settings for SERVER_MODE=prod: ``gunicorn -c gunicorn.conf.py app:app``."""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Seconds in-flight requests get to finish after SIGTERM
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "20"))
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")  # "-" for stdout
+
+# Import the app once in the master, loading the whole store up front, so
+# forked workers share the data copy-on-write instead of each loading it
+preload_app = True
+os.environ.setdefault("CLAIMCENTER_EAGER_LOAD", "1")
+
+
+def pre_fork(server, worker):
+    # Keep the collector out of the preloaded objects; collections in the
+    # workers would otherwise touch (and un-share) every page holding them
+    gc.freeze()
@@ -0,0 +1,27 @@
+"""Build the SQLite store from the JSON data files.
+
+    python import_data.py [db_path] [--data-dir data]
+
+Then start the API with CLAIMCENTER_STORAGE=sqlite (and CLAIMCENTER_DB if
+the database is not at data/claimcenter.db).
+"""
+import argparse
+import os
+import time
+
+from storage import DATA_DIR, import_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path", nargs="?", default=os.path.join(DATA_DIR, "claimcenter.db"))
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import_json(args.data_dir, args.db_path)
+    print(f"Imported {args.data_dir} into {args.db_path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Storage backends for the ClaimCenter mock.
+
+``JsonStore`` serves the ``data/*.json`` files, loading each one on first
+use; ``SqliteStore`` serves an indexed SQLite database built from them with
+``import_data.py``. Both open in constant time and expose the same lookups.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id TEXT PRIMARY KEY,
+    policy_id TEXT,
+    status TEXT,
+    loss_date TEXT,
+    lob TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_policy_id ON claims (policy_id);
+CREATE INDEX IF NOT EXISTS claims_status ON claims (status);
+CREATE INDEX IF NOT EXISTS claims_loss_date ON claims (loss_date);
+CREATE INDEX IF NOT EXISTS claims_lob ON claims (lob);
+
+CREATE TABLE IF NOT EXISTS policies (
+    policy_id TEXT PRIMARY KEY,
+    lob TEXT,
+    status TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS policies_lob ON policies (lob);
+"""
+
+# Per-entity lists, keyed by the owning claim or policy
+CHILD_TABLES = {
+    "documents": "claim_id",
+    "injuries": "claim_id",
+    "coverages": "policy_id",
+    "endorsements": "policy_id",
+}
+
+for _table, _key in CHILD_TABLES.items():
+    SCHEMA += f"""
+CREATE TABLE IF NOT EXISTS {_table} (
+    {_key} TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY ({_key}, position)
+) WITHOUT ROWID;
+"""
+
+
+class JsonStore:
+    """Whole-file JSON dicts, each file loaded on first access."""
+
+    FILES = ("claims", "policies", "documents", "injuries", "coverages", "endorsements")
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._data = {}
+        # The files are read-only while the service runs
+        self.last_modified = max(
+            os.path.getmtime(os.path.join(data_dir, f"{name}.json")) for name in self.FILES
+        )
+
+    def _table(self, name):
+        table = self._data.get(name)
+        if table is None:
+            with self._lock:
+                if name not in self._data:
+                    with open(os.path.join(self.data_dir, f"{name}.json")) as f:
+                        self._data[name] = json.load(f)
+                table = self._data[name]
+        return table
+
+    def load_all(self):
+        """Load every file up front (e.g. before forking workers)."""
+        for name in self.FILES:
+            self._table(name)
+
+    def claim(self, claim_id):
+        return self._table("claims").get(claim_id)
+
+    def policy(self, policy_id):
+        return self._table("policies").get(policy_id)
+
+    def documents(self, claim_id):
+        return self._table("documents").get(claim_id, [])
+
+    def injuries(self, claim_id):
+        return self._table("injuries").get(claim_id, [])
+
+    def coverages(self, policy_id):
+        return self._table("coverages").get(policy_id, [])
+
+    def endorsements(self, policy_id):
+        return self._table("endorsements").get(policy_id, [])
+
+    def search_claims(self, status=None, lob=None, policy_id=None,
+                      loss_date_from=None, loss_date_to=None, limit=100):
+        policies = self._table("policies")
+        found = []
+        for claim in self._table("claims").values():
+            if len(found) >= limit:
+                break
+            if status and claim.get("status") != status:
+                continue
+            if policy_id and claim.get("policy_id") != policy_id:
+                continue
+            if lob and policies.get(claim.get("policy_id"), {}).get("lob") != lob:
+                continue
+            loss_date = claim.get("loss_date", "")
+            if loss_date_from and loss_date < loss_date_from:
+                continue
+            if loss_date_to and loss_date > loss_date_to:
+                continue
+            found.append(claim)
+        return found
+
+
+class SqliteStore:
+    """Indexed SQLite database, opened read-only with memory-mapped I/O.
+
+    Connections are per thread and per process, so the store can be created
+    before gunicorn forks its workers.
+    """
+
+    def __init__(self, path, mmap_size=256 * 1024 * 1024):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{path} not found; build it with `python import_data.py {path}`"
+            )
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self.last_modified = os.path.getmtime(path)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load_all(self):
+        pass
+
+    def _one(self, sql, key):
+        row = self._conn().execute(sql, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _children(self, table, key):
+        rows = self._conn().execute(
+            f"SELECT body FROM {table} WHERE {CHILD_TABLES[table]} = ? ORDER BY position",
+            (key,),
+        )
+        return [json.loads(body) for body, in rows]
+
+    def claim(self, claim_id):
+        return self._one("SELECT body FROM claims WHERE claim_id = ?", claim_id)
+
+    def policy(self, policy_id):
+        return self._one("SELECT body FROM policies WHERE policy_id = ?", policy_id)
+
+    def documents(self, claim_id):
+        return self._children("documents", claim_id)
+
+    def injuries(self, claim_id):
+        return self._children("injuries", claim_id)
+
+    def coverages(self, policy_id):
+        return self._children("coverages", policy_id)
+
+    def endorsements(self, policy_id):
+        return self._children("endorsements", policy_id)
+
+    def search_claims(self, status=None, lob=None, policy_id=None,
+                      loss_date_from=None, loss_date_to=None, limit=100):
+        clauses, params = [], []
+        for column, value in (("status", status), ("lob", lob), ("policy_id", policy_id)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if loss_date_from:
+            clauses.append("loss_date >= ?")
+            params.append(loss_date_from)
+        if loss_date_to:
+            clauses.append("loss_date <= ?")
+            params.append(loss_date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT body FROM claims {where} ORDER BY claim_id LIMIT ?", (*params, limit)
+        )
+        return [json.loads(body) for body, in rows]
+
+
+def import_json(data_dir, db_path, batch_size=10000):
+    """Build (or replace) a SQLite store from the ``data/*.json`` files."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;")
+    conn.executescript(SCHEMA)
+    source = JsonStore(data_dir)
+
+    def insert(sql, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                batch.clear()
+        conn.executemany(sql, batch)
+
+    policies = source._table("policies")
+    insert(
+        "INSERT INTO policies VALUES (?, ?, ?, ?)",
+        ((pid, p.get("lob"), p.get("status"), json.dumps(p)) for pid, p in policies.items()),
+    )
+    insert(
+        "INSERT INTO claims VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                cid,
+                c.get("policy_id"),
+                c.get("status"),
+                c.get("loss_date"),
+                policies.get(c.get("policy_id"), {}).get("lob"),
+                json.dumps(c),
+            )
+            for cid, c in source._table("claims").items()
+        ),
+    )
+    # Free each file once imported; at a million claims they don't all fit
+    source._data.pop("claims")
+    for table in CHILD_TABLES:
+        insert(
+            f"INSERT INTO {table} VALUES (?, ?, ?)",
+            (
+                (key, position, json.dumps(item))
+                for key, items in source._table(table).items()
+                for position, item in enumerate(items)
+            ),
+        )
+        source._data.pop(table)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def open_store(environ=os.environ):
+    """Store selected by CLAIMCENTER_STORAGE (json|sqlite) and CLAIMCENTER_DB."""
+    backend = environ.get("CLAIMCENTER_STORAGE", "json")
+    if backend == "json":
+        return JsonStore(environ.get("CLAIMCENTER_DATA_DIR", DATA_DIR))
+    if backend == "sqlite":
+        return SqliteStore(environ.get("CLAIMCENTER_DB", os.path.join(DATA_DIR, "claimcenter.db")))
+    raise ValueError(f"Unknown CLAIMCENTER_STORAGE backend: {backend}")
@@ -1,32 +1,112 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+import json
+import os
+import engine
+import telemetry
+from jobs import JobQueue, PENDING, QueueFull
 
 app = Flask(__name__)
+# Per-route latency histograms at /metrics; joins the caller's trace
+telemetry.init_app(app, "claimlens")
+
+# Analyses run on CLAIMLENS_WORKERS threads; beyond CLAIMLENS_MAX_PENDING
+# queued or running jobs, submissions get a 429
+jobs = JobQueue(
+    engine.analyze,
+    max_workers=int(os.environ.get("CLAIMLENS_WORKERS", "4")),
+    max_pending=int(os.environ.get("CLAIMLENS_MAX_PENDING", "100")),
+    cache_size=int(os.environ.get("CLAIMLENS_RESULT_CACHE_SIZE", "1024")),
+)
+# Upper bound on ?wait= long-polls and on how long /analyze blocks
+MAX_WAIT = float(os.environ.get("CLAIMLENS_MAX_WAIT", "30"))
+
+
+def _submit():
+    """Submit the request body's analysis; returns (job, None) or (None, error response)."""
+    data = request.get_json(silent=True) or {}
+    claim_id = data.get("claim_id")
+    documents = data.get("documents", [])
+    if not claim_id or not isinstance(documents, list):
+        return None, (jsonify({"error": "Missing claim_id or documents is not a list"}), 400)
+    # The engine reads fields of every document; reject the rest before queueing
+    if not all(isinstance(document, dict) for document in documents):
+        return None, (jsonify({"error": "documents must be a list of JSON objects"}), 400)
+    try:
+        return jobs.submit(claim_id, documents), None
+    except QueueFull as e:
+        return None, (jsonify({"error": str(e)}), 429, {"Retry-After": "1"})
+
+
+def _job_response(job):
+    status = 200 if job.status not in PENDING else 202
+    return jsonify(dict(job.to_dict(), status_url=f"/jobs/{job.job_id}")), status
+
 
 @app.route("/analyze", methods=["POST"])
 def analyze():
-    data = request.json
-    claim_id = data.get("claim_id")
+    """Synchronous analysis: submit a job and wait for its result."""
+    job, error = _submit()
+    if error:
+        return error
+    jobs.wait(job, MAX_WAIT)
+    if job.status == "done":
+        return jsonify(job.result)
+    if job.status == "failed":
+        return jsonify({"error": job.error}), 500
+    return _job_response(job)
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    job, error = _submit()
+    if error:
+        return error
+    response, status = _job_response(job)
+    response.headers["Location"] = f"/jobs/{job.job_id}"
+    return response, status
+
+
+@app.route("/jobs/stats")
+def job_stats():
+    return jsonify(dict(jobs.stats(), findings=engine.findings_store.stats()))
+
+
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    """Job status; ?wait=<seconds> holds the request until the job finishes."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    # Unparsable values read as 0 (no wait), negative ones are clamped to it
+    wait = min(max(request.args.get("wait", 0, type=float), 0.0), MAX_WAIT)
+    if wait > 0:
+        jobs.wait(job, wait)
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>/stream")
+def stream_job(job_id):
+    """NDJSON: the job's status now and after every change, ending with the
+    finished job (result or error)."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        while True:
+            current = job.to_dict()
+            yield json.dumps(current) + "\n"
+            if current["status"] not in PENDING:
+                return
+            jobs.wait(job, MAX_WAIT, seen=current["status"])
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-    return jsonify({
-        "claim_id": claim_id,
-        "risk_score": 8.5,
-        "key_findings": [
-            "Medical records indicate pre-existing condition",
-            "Treatment plan is reasonable and necessary"
-        ],
-        "recommended_actions": [
-            {"priority": "High", "action": "Request updated medical records"},
-            {"priority": "Medium", "action": "Schedule independent medical examination"}
-        ],
-        "coverage_analysis": {
-            "adequacy": "Adequate",
-            "gaps": ["Rental car coverage may be insufficient"]
-        },
-        "icd10_codes": [
-            {"code": "M54.5", "description": "Low back pain"},
-            {"code": "S13.4", "description": "Sprain of cervical spine"}
-        ]
-    })
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001,debug=True)
+    # Werkzeug dev server (SERVER_MODE=dev); production runs under gunicorn
+    app.run(
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "5001")),
+        debug=os.environ.get("FLASK_DEBUG", "1") == "1",
+    )
@@ -0,0 +1,203 @@
+"""Mock ClaimLens analysis engine.
+
+Documents are analyzed one at a time and their findings stored by content
+hash; the claim-level result is merged from the findings of its documents.
+When a document is added to a claim, only that document is analyzed.
+
+``analyze_document`` stands in for the real engine, which takes seconds per
+document: set CLAIMLENS_SECONDS_PER_DOCUMENT to make the mock take that long.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Part of every content hash, so results of an older engine are not reused
+ENGINE_VERSION = "mock-2"
+
+SECONDS_PER_DOCUMENT = float(os.environ.get("CLAIMLENS_SECONDS_PER_DOCUMENT", "0"))
+
+# Mock findings by document kind, matched against the filename
+DOCUMENT_FINDINGS = (
+    ("police", {
+        "risk_score": 6.0,
+        "key_findings": ["Police report confirms the reported loss"],
+        "recommended_actions": [],
+        "icd10_codes": [],
+    }),
+    ("medical", {
+        "risk_score": 8.5,
+        "key_findings": [
+            "Medical records indicate pre-existing condition",
+            "Treatment plan is reasonable and necessary"
+        ],
+        "recommended_actions": [
+            {"priority": "High", "action": "Request updated medical records"},
+            {"priority": "Medium", "action": "Schedule independent medical examination"}
+        ],
+        "icd10_codes": [
+            {"code": "M54.5", "description": "Low back pain"},
+            {"code": "S13.4", "description": "Sprain of cervical spine"}
+        ],
+    }),
+    ("repair", {
+        "risk_score": 5.0,
+        "key_findings": ["Repair estimate is consistent with the reported damage"],
+        "recommended_actions": [{"priority": "Low", "action": "Verify estimate with a preferred shop"}],
+        "icd10_codes": [],
+    }),
+    ("photo", {
+        "risk_score": 3.0,
+        "key_findings": ["Photos match the described damage"],
+        "recommended_actions": [],
+        "icd10_codes": [],
+    }),
+    ("incident", {
+        "risk_score": 6.5,
+        "key_findings": ["Incident report places the loss on insured premises"],
+        "recommended_actions": [{"priority": "Medium", "action": "Request premises maintenance records"}],
+        "icd10_codes": [],
+    }),
+    ("liability", {
+        "risk_score": 7.5,
+        "key_findings": ["Liability notice indicates a potential third-party claim"],
+        "recommended_actions": [{"priority": "High", "action": "Notify liability counsel"}],
+        "icd10_codes": [],
+    }),
+    ("witness", {
+        "risk_score": 5.5,
+        "key_findings": ["Witness statement corroborates the claimant's account"],
+        "recommended_actions": [],
+        "icd10_codes": [],
+    }),
+)
+NO_FINDINGS = {
+    "risk_score": 2.0,
+    "key_findings": [],
+    "recommended_actions": [],
+    "icd10_codes": [],
+}
+PRIORITIES = {"High": 0, "Medium": 1, "Low": 2}
+
+
+def _hash(value):
+    canonical = json.dumps(
+        {"engine": ENGINE_VERSION, "value": value},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def content_hash(claim_id, documents):
+    """Key of a claim analysis: the same claim with the same documents
+    always yields the same result."""
+    return _hash({"claim_id": claim_id, "documents": documents})
+
+
+def document_hash(document):
+    """Key of a document's findings: the whole document record (metadata
+    and any content or checksum it carries), so an edited document is
+    analyzed again."""
+    return _hash(document)
+
+
+class FindingsStore:
+    """Per-document findings by document hash, LRU-bounded; maxsize=0
+    disables it."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self._lock:
+            findings = self._data.get(key)
+            if findings is None:
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return findings
+
+    def set(self, key, findings):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = findings
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, size=len(self._data), maxsize=self.maxsize)
+
+
+findings_store = FindingsStore(int(os.environ.get("CLAIMLENS_FINDINGS_CACHE_SIZE", "100000")))
+
+
+def analyze_document(document):
+    if SECONDS_PER_DOCUMENT:
+        time.sleep(SECONDS_PER_DOCUMENT)
+    filename = str(document.get("filename", "")).lower()
+    for kind, findings in DOCUMENT_FINDINGS:
+        if kind in filename:
+            return findings
+    return NO_FINDINGS
+
+
+def merge(claim_id, documents, reused=0):
+    """Claim-level result from ``[(document hash, document, findings)]``: the
+    highest document risk score and the union of findings, actions and codes."""
+    key_findings, actions, codes = [], {}, {}
+    for _, _, findings in documents:
+        key_findings.extend(f for f in findings["key_findings"] if f not in key_findings)
+        for action in findings["recommended_actions"]:
+            actions.setdefault(action["action"], action)
+        for code in findings["icd10_codes"]:
+            codes.setdefault(code["code"], code)
+    return {
+        "claim_id": claim_id,
+        "documents_analyzed": len(documents),
+        # Documents whose stored findings were used instead of analyzing them
+        "documents_reused": reused,
+        "risk_score": max((f["risk_score"] for _, _, f in documents), default=0.0),
+        "key_findings": key_findings,
+        "recommended_actions": sorted(
+            actions.values(), key=lambda a: PRIORITIES.get(a["priority"], len(PRIORITIES))
+        ),
+        "coverage_analysis": {
+            "adequacy": "Adequate",
+            "gaps": ["Rental car coverage may be insufficient"]
+        },
+        "icd10_codes": list(codes.values()),
+        "documents": [
+            {
+                "document_id": document.get("document_id"),
+                "content_hash": key,
+                "key_findings": findings["key_findings"],
+                "icd10_codes": findings["icd10_codes"],
+            }
+            for key, document, findings in documents
+        ],
+    }
+
+
+def analyze(claim_id, documents):
+    """Analyze the documents not seen before and merge them with the stored
+    findings of the rest."""
+    analyzed, reused = [], 0
+    for document in documents:
+        key = document_hash(document)
+        findings = findings_store.get(key)
+        if findings is None:
+            findings = analyze_document(document)
+            findings_store.set(key, findings)
+        else:
+            reused += 1
+        analyzed.append((key, document, findings))
+    return merge(claim_id, analyzed, reused)
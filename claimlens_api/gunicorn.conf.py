@@ -0,0 +1,22 @@
+"""Gunicorn settings for SERVER_MODE=prod: ``gunicorn -c gunicorn.conf.py app:app``."""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+# Jobs live in the worker that accepted them, and a status poll must reach
+# that worker: one process, with threads for the long-polls
+workers = int(os.environ.get("GUNICORN_WORKERS", "1"))
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+worker_class = "gthread"
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Seconds in-flight requests get to finish after SIGTERM
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "20"))
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")  # "-" for stdout
+
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Keep the collector out of the preloaded objects so workers share them
+    gc.freeze()
@@ -0,0 +1,153 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import content_hash
+
+PENDING = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    __slots__ = (
+        "job_id", "key", "claim_id", "status", "result", "error", "cached",
+        "created", "started", "finished",
+    )
+
+    def __init__(self, key, claim_id):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.claim_id = claim_id
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        job = {
+            "job_id": self.job_id,
+            "claim_id": self.claim_id,
+            "status": self.status,
+            "cached": self.cached,
+            "content_hash": self.key,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.status == "done":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+
+class JobQueue:
+    """Analysis jobs run on a bounded worker pool.
+
+    Jobs are keyed by the content hash of what they analyze. Submitting work
+    identical to a queued or running job returns that job instead of a new
+    one, and results are kept in an LRU by content hash, so unchanged
+    documents are answered with an already completed job. At most
+    ``max_pending`` distinct jobs wait or run at once; beyond that
+    ``submit`` raises QueueFull. The last ``retain`` jobs can be looked up.
+    """
+
+    def __init__(self, analyze, max_workers=4, max_pending=100, cache_size=1024, retain=10000):
+        self._analyze = analyze
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.retain = retain
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="claimlens-job")
+        self._changed = threading.Condition()
+        self._jobs = OrderedDict()     # job_id -> Job
+        self._in_flight = {}           # content hash -> queued/running Job
+        self._results = OrderedDict()  # content hash -> result, LRU
+        self._counters = {
+            "submitted": 0, "deduplicated": 0, "cache_hits": 0,
+            "completed": 0, "failed": 0, "rejected": 0,
+        }
+
+    def submit(self, claim_id, documents):
+        key = content_hash(claim_id, documents)
+        with self._changed:
+            self._counters["submitted"] += 1
+            job = self._in_flight.get(key)
+            if job is not None:
+                self._counters["deduplicated"] += 1
+                return job
+            job = Job(key, claim_id)
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._counters["cache_hits"] += 1
+                job.status, job.result, job.cached = "done", self._results[key], True
+                job.started = job.finished = job.created
+                self._remember(job)
+                return job
+            if len(self._in_flight) >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise QueueFull(f"{self.max_pending} analyses already pending")
+            self._in_flight[key] = job
+            self._remember(job)
+        self.pool.submit(self._run, job, documents)
+        return job
+
+    def _remember(self, job):
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.retain:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status in PENDING:
+                break
+            self._jobs.popitem(last=False)
+
+    def _run(self, job, documents):
+        with self._changed:
+            job.status, job.started = "running", time.time()
+            self._changed.notify_all()
+        try:
+            result, error = self._analyze(job.claim_id, documents), None
+        except Exception as e:
+            result, error = None, str(e)
+        with self._changed:
+            job.finished = time.time()
+            if error is None:
+                job.status, job.result = "done", result
+                self._counters["completed"] += 1
+                self._results[job.key] = result
+                if len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+            else:
+                job.status, job.error = "failed", error
+                self._counters["failed"] += 1
+            del self._in_flight[job.key]
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, timeout, seen=None):
+        """Block until ``job`` is finished, or its status differs from
+        ``seen``, or ``timeout`` seconds pass."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job.status not in PENDING or (seen is not None and job.status != seen),
+                timeout,
+            )
+        return job
+
+    def stats(self):
+        with self._changed:
+            return dict(
+                self._counters,
+                pending=len(self._in_flight),
+                cached_results=len(self._results),
+                retained_jobs=len(self._jobs),
+            )
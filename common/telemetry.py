@@ -0,0 +1,212 @@
+"""Latency tracing and Prometheus-style metrics for the Flask services.
+
+Shared by mcp/, claimcenter_api/ and claimlens_api/, which import it flat:
+their Dockerfiles copy it next to the service code (docker-compose builds
+from the repo root), and local runs need ``PYTHONPATH=common``.
+
+``init_app`` times every request into a histogram labelled by route
+template, serves them at ``/metrics`` and joins the caller's trace through
+the ``X-Trace-Id``/``X-Parent-Span-Id`` headers. ``span`` times a block of
+code as a child span of the current one. Metrics are kept per process.
+"""
+import bisect
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+TRACE_HEADER = "X-Trace-Id"
+PARENT_HEADER = "X-Parent-Span-Id"
+
+# Seconds; the last bucket is +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+trace_id_var = contextvars.ContextVar("trace_id", default=None)
+span_id_var = contextvars.ContextVar("span_id", default=None)
+# (start time, finished spans) of the current request when it asked for timings
+_collector_var = contextvars.ContextVar("span_collector", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Latency histograms keyed by metric name and label set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._help = {}
+
+    def observe(self, name, seconds, help_text="", **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+                self._help.setdefault(name, help_text or name)
+            histogram.observe(seconds)
+
+    def render(self, service=None):
+        """Prometheus text format. With ``service``, only its series: those
+        labelled with it or named ``<service>_...``."""
+        with self._lock:
+            series = sorted(
+                (name, labels, list(h.counts), h.sum, h.count)
+                for (name, labels), h in self._histograms.items()
+                if service is None
+                or ("service", service) in labels
+                or name.startswith(service + "_")
+            )
+        lines = []
+        previous = None
+        for name, labels, counts, total, count in series:
+            if name != previous:
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                previous = name
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + (None,), counts):
+                cumulative += bucket
+                le = "+Inf" if bound is None else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+REGISTRY = Registry()
+
+
+def new_id():
+    return uuid.uuid4().hex[:16]
+
+
+def start_trace(trace_id=None, parent_span_id=None, collect=False):
+    """Begin (or join) a trace in the current context; with ``collect`` the
+    finished spans are kept for ``collected_spans``."""
+    trace_id_var.set(trace_id or new_id())
+    span_id_var.set(parent_span_id)
+    _collector_var.set((time.perf_counter(), []) if collect else None)
+    return trace_id_var.get()
+
+
+def trace_headers():
+    """Headers that make a downstream call part of the current trace."""
+    trace_id = trace_id_var.get()
+    if trace_id is None:
+        return {}
+    headers = {TRACE_HEADER: trace_id}
+    if span_id_var.get():
+        headers[PARENT_HEADER] = span_id_var.get()
+    return headers
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_span_id", "labels", "attrs")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.span_id = new_id()
+        self.parent_span_id = span_id_var.get()
+        self.labels = labels  # metric labels; keep them low-cardinality
+        self.attrs = {}       # extra detail for the returned timings only
+
+
+@contextmanager
+def span(name, metric=None, **labels):
+    """Time the block as a child span of the current one, recording it in
+    the ``metric`` histogram (if given; name it ``<service>_...``). The
+    yielded ``Span`` can take more labels or attrs (e.g. a status) before
+    the block ends."""
+    current = Span(name, labels)
+    token = span_id_var.set(current.span_id)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - started
+        span_id_var.reset(token)
+        if metric:
+            REGISTRY.observe(metric, elapsed, f"{name} latency in seconds", **current.labels)
+        collector = _collector_var.get()
+        if collector is not None:
+            request_started, spans = collector
+            spans.append({
+                "name": name,
+                "span_id": current.span_id,
+                "parent_span_id": current.parent_span_id,
+                **current.labels,
+                **current.attrs,
+                "start_ms": round((started - request_started) * 1000, 3),
+                "duration_ms": round(elapsed * 1000, 3),
+            })
+
+
+def collected_spans():
+    """Spans finished so far in this request, by start time; None unless the
+    trace was started with ``collect``."""
+    collector = _collector_var.get()
+    if collector is None:
+        return None
+    return sorted(collector[1], key=lambda s: s["start_ms"])
+
+
+def init_app(app, service, collect=lambda: False):
+    """Trace and time every request of ``app`` and serve ``/metrics``.
+
+    ``collect()`` is asked per request whether to keep its spans.
+    """
+
+    @app.before_request
+    def _start_trace():
+        g.telemetry_started = time.perf_counter()
+        start_trace(
+            request.headers.get(TRACE_HEADER) or g.get("request_id"),
+            request.headers.get(PARENT_HEADER),
+            collect=collect(),
+        )
+
+    @app.after_request
+    def _record(response):
+        started = g.get("telemetry_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # Route templates, not paths, keep the label set bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REGISTRY.observe(
+            "http_request_duration_seconds", elapsed, "HTTP request latency in seconds",
+            service=service, method=request.method, route=route, status=response.status_code,
+        )
+        response.headers[TRACE_HEADER] = trace_id_var.get()
+        response.headers["Server-Timing"] = f"app;dur={elapsed * 1000:.3f}"
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render(service), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,251 @@
+"""asyncio variant of the orchestrator's ``POST /orchestrate`` and
+``POST /orchestrate/stream``.
+
+Runs the same planner, step graph, entity cache, tracing and circuit
+breakers as orchestrator.py on an aiohttp server, with the same request and
+response shape (both build them with orchestration.py) and the same cache
+endpoints. A request waiting on upstreams is a suspended coroutine
+rather than a blocked thread, so one process holds thousands of in-flight
+orchestrations. Batch endpoints are only served by orchestrator.py.
+
+    python async_orchestrator.py      # or SERVER_MODE=async in Docker
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+from aiohttp import web
+
+import telemetry
+from async_upstream import AsyncUpstreamClient
+from executor import AsyncStepExecutor
+from fetcher import AsyncRequestFetcher
+from logs import log, start_request
+from orchestration import (
+    ANALYSIS_WAIT, USE_COMPOSITE, composite_url, configure_logging, entity_cache_from_env,
+    failure, flush_plans, invalidate_entities, log_fetch, next_poll, orchestrate_response,
+    parse_orchestrate, prime_composite, revalidation_headers, steps_result, stream_done,
+    stream_error, stream_order, stream_step, upstream_clients,
+)
+from planner import plan_cache
+
+configure_logging()
+
+# Connections per upstream; orchestrations beyond it queue for a connection
+POOL_SIZE = int(os.environ.get("MCP_ASYNC_POOL_SIZE", "100"))
+
+claimcenter, claimlens = upstream_clients(pool_size=POOL_SIZE, client_class=AsyncUpstreamClient)
+
+entity_cache = entity_cache_from_env()
+
+executor = AsyncStepExecutor()
+
+
+def json_response(body, status=200):
+    return web.json_response(body, status=status, dumps=lambda o: json.dumps(o, default=str))
+
+
+async def wants_timings(request):
+    if request.query.get("timings") == "1":
+        return True
+    try:
+        body = await request.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("debug") is True
+
+
+def response_headers(request):
+    """Request id, trace id and the time spent so far, as the Flask apps
+    send them."""
+    return {
+        "X-Request-ID": request["request_id"],
+        telemetry.TRACE_HEADER: telemetry.trace_id_var.get(),
+        "Server-Timing": f"app;dur={(time.perf_counter() - request['started']) * 1000:.3f}",
+    }
+
+
+@web.middleware
+async def instrument(request, handler):
+    """Request id, trace and latency histogram, as logs/telemetry.init_app
+    do for the Flask apps."""
+    started = time.perf_counter()
+    request_id = start_request(request.headers.get("X-Request-ID"))
+    telemetry.start_trace(
+        request.headers.get(telemetry.TRACE_HEADER) or request_id,
+        request.headers.get(telemetry.PARENT_HEADER),
+        collect=await wants_timings(request),
+    )
+    request["started"] = started
+    request["request_id"] = request_id
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        response = e
+    elapsed = time.perf_counter() - started
+    resource = request.match_info.route.resource
+    telemetry.REGISTRY.observe(
+        "http_request_duration_seconds", elapsed, "HTTP request latency in seconds",
+        service="mcp", method=request.method,
+        route=resource.canonical if resource is not None else "unmatched",
+        status=response.status,
+    )
+    # Streamed responses sent theirs before the first line
+    if not response.prepared:
+        response.headers.update(response_headers(request))
+    return response
+
+
+async def fetch_url(url, etag=None):
+    fetched = await claimcenter.get(url, headers=revalidation_headers(etag))
+    log_fetch(url, fetched)
+    return fetched
+
+
+async def analyze(job):
+    """ClaimLens analysis job, submitted and long-polled as orchestrator.analyze."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + ANALYSIS_WAIT
+    fetched = await claimlens.post(claimlens.url("/jobs"), job)
+    path = next_poll(fetched, deadline, loop.time())
+    while path:
+        fetched = await claimlens.get(claimlens.url(path))
+        path = next_poll(fetched, deadline, loop.time())
+    return fetched
+
+
+def step_fetch(fetcher):
+    async def fetch(service, request):
+        if service == "claimlens":
+            return await analyze(request)
+        return await fetcher.get(claimcenter.url(request))
+
+    return fetch
+
+
+async def prefetch(claim_id, actions, fetcher):
+    """Composite ClaimCenter request, as orchestrator.prefetch."""
+    url = composite_url(claimcenter, entity_cache, claim_id, executor.nodes(actions))
+    if url is None:
+        return
+    with telemetry.span("prefetch"):
+        composite = await fetcher.get(url)
+    prime_composite(fetcher, claimcenter, claim_id, composite)
+
+
+async def run_steps(claim_id, actions, fetcher):
+    if USE_COMPOSITE:
+        await prefetch(claim_id, actions, fetcher)
+    return steps_result(claim_id, await executor.run(claim_id, actions, step_fetch(fetcher)))
+
+
+async def request_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def orchestrate(request):
+    parsed, error = parse_orchestrate(await request_json(request))
+    if error:
+        return json_response(*error)
+    prompt, claim_id, actions = parsed
+
+    fetcher = AsyncRequestFetcher(fetch_url, cache=entity_cache)
+
+    try:
+        result = await run_steps(claim_id, actions, fetcher)
+    except Exception as e:
+        return json_response(*failure(e))
+    return json_response(orchestrate_response(prompt, result, fetcher, request["started"]))
+
+
+async def orchestrate_stream(request):
+    """NDJSON variant of /orchestrate, with the lines orchestrator.py's
+    /orchestrate/stream sends."""
+    parsed, error = parse_orchestrate(await request_json(request), "Orchestrate stream request")
+    if error:
+        return json_response(*error)
+    prompt, claim_id, actions = parsed
+    order = stream_order(executor.graph, actions)
+    fetcher = AsyncRequestFetcher(fetch_url, cache=entity_cache)
+
+    async def generate():
+        outputs = {}
+        try:
+            if USE_COMPOSITE:
+                await prefetch(claim_id, actions, fetcher)
+            async for name, output in executor.iter_completed(claim_id, actions, step_fetch(fetcher)):
+                outputs[name] = output
+                yield stream_step(order, name, output)
+        except Exception as e:
+            yield stream_error(e)
+            return
+        yield stream_done(prompt, claim_id, order, outputs, fetcher)
+
+    response = web.StreamResponse(headers=response_headers(request))
+    response.content_type = "application/x-ndjson"
+    await response.prepare(request)
+    async with contextlib.aclosing(generate()) as lines:
+        async for line in lines:
+            await response.write(line.encode())
+    await response.write_eof()
+    return response
+
+
+async def invalidate_cache(request):
+    return json_response(*invalidate_entities(entity_cache, await request_json(request)))
+
+
+async def cache_stats(request):
+    return json_response(entity_cache.stats())
+
+
+async def plan_cache_stats(request):
+    return json_response(plan_cache.stats())
+
+
+async def flush_plan_cache(request):
+    return json_response(flush_plans())
+
+
+async def upstream_stats(request):
+    return json_response({"claimcenter": claimcenter.stats(), "claimlens": claimlens.stats()})
+
+
+async def metrics(request):
+    return web.Response(text=telemetry.REGISTRY.render("mcp"), content_type="text/plain")
+
+
+async def _start_clients(app):
+    await claimcenter.start()
+    await claimlens.start()
+
+
+async def _close_clients(app):
+    await claimcenter.close()
+    await claimlens.close()
+
+
+def make_app():
+    app = web.Application(middlewares=[instrument])
+    app.router.add_post("/orchestrate", orchestrate)
+    app.router.add_post("/orchestrate/stream", orchestrate_stream)
+    app.router.add_post("/cache/invalidate", invalidate_cache)
+    app.router.add_get("/cache/stats", cache_stats)
+    app.router.add_get("/plan-cache/stats", plan_cache_stats)
+    app.router.add_post("/plan-cache/flush", flush_plan_cache)
+    app.router.add_get("/upstream/stats", upstream_stats)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(_start_clients)
+    app.on_cleanup.append(_close_clients)
+    return app
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", "8002"))
+    log.info("Starting async MCP Orchestrator on port %s...", port)
+    web.run_app(make_app(), host="0.0.0.0", port=port, access_log=None, print=None)
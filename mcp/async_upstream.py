@@ -0,0 +1,105 @@
+import asyncio
+import json
+import random
+
+import aiohttp
+
+from steps import Fetched
+from telemetry import span, trace_headers
+from upstream import (
+    RETRY_STATUSES,
+    CircuitOpenError,
+    UpstreamClient,
+    UpstreamError,
+    record_server_time,
+    route_label,
+)
+
+
+class AsyncUpstreamClient(UpstreamClient):
+    """aiohttp counterpart of UpstreamClient, with the same retries, circuit
+    breaker, tracing and counters.
+
+    The session belongs to an event loop, so it is opened by ``start()`` on
+    the loop that will use it and released by ``close()``. ``pool_size``
+    caps open connections to the upstream; requests beyond it wait for one.
+    """
+
+    def _make_session(self):
+        return None
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1]),
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, method, url, headers, body):
+        with span(
+            "upstream", metric="mcp_upstream_request_duration_seconds",
+            upstream=self.name, method=method, route=route_label(url),
+        ) as current:
+            current.attrs["url"] = url
+            try:
+                async with self.session.request(
+                    method, url, json=body, headers={**trace_headers(), **(headers or {})}
+                ) as resp:
+                    content = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                current.labels["status"] = "error"
+                raise
+            current.labels["status"] = resp.status
+            record_server_time(current, resp.headers)
+            return resp.status, content, resp.headers.get("ETag")
+
+    async def request(self, method, url, body=None, headers=None):
+        """Send one idempotent request and return a Fetched with the decoded
+        JSON body; ``get`` and ``post`` are inherited and return its
+        coroutine."""
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open, failing fast")
+        try:
+            fetched = await self._attempts(method, url, body, headers)
+        except UpstreamError:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Includes CancelledError: a failed sibling step cancels this one
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return fetched
+
+    async def _attempts(self, method, url, body, headers):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                await asyncio.sleep(
+                    random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+                )
+            self._count("requests")
+            try:
+                status, content, etag = await self._send(method, url, headers, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = UpstreamError(f"{self.name} request to {url} failed: {e!r}")
+                continue
+            if status in RETRY_STATUSES:
+                error = UpstreamError(f"{self.name} request to {url} failed with status {status}")
+                continue
+            if status == 304:
+                return Fetched(304, None, etag)
+            try:
+                data = json.loads(content)
+            except ValueError as e:
+                if status >= 400:
+                    return Fetched(status, None)
+                raise UpstreamError(f"{self.name} returned invalid JSON from {url}: {e}")
+            return Fetched(status, data, etag)
+        raise error
@@ -0,0 +1,48 @@
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class BatchRunner:
+    """Runs one planned orchestration over many claims.
+
+    All batches share a pool of ``max_in_flight`` claim slots, separate from
+    the interactive request threads, so however many batches are running
+    they never hold more than that many claims at once.
+    """
+
+    def __init__(self, max_in_flight=4):
+        self.max_in_flight = max_in_flight
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="mcp-batch"
+        )
+
+    def iter_results(self, claim_ids, run_claim, max_in_flight=None):
+        """Yield ``(index, result)`` pairs as claims complete.
+
+        At most ``max_in_flight`` claims of this batch are submitted at a
+        time, and the next claim is only submitted once a finished result has
+        been taken by the consumer, so a slow reader throttles the batch
+        instead of results piling up in memory.
+        """
+        window = min(max_in_flight or self.max_in_flight, self.max_in_flight)
+        pending = iter(enumerate(claim_ids))
+        running = {}
+
+        def submit_next():
+            for index, claim_id in pending:
+                future = self.pool.submit(contextvars.copy_context().run, run_claim, claim_id)
+                running[future] = index
+                return
+
+        try:
+            for _ in range(window):
+                submit_next()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    yield index, future.result()
+                    submit_next()
+        finally:
+            for future in running:
+                future.cancel()
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry TTL and tag-based invalidation.
+
+    Holds at most ``maxsize`` entries; the least recently used one is evicted
+    to make room. The tag index only references live entries, so memory stays
+    bounded however many distinct keys pass through. With ``keep_stale``,
+    expired entries stay (until evicted or invalidated) for ``get_stale``.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None, keep_stale=False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.keep_stale = keep_stale
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tags = {}                # tag -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                if not self.keep_stale:
+                    self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key, default=None):
+        """The value even if it has expired, e.g. to revalidate it upstream;
+        not counted in the stats."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def __contains__(self, key):
+        # Freshness check that doesn't count towards hit/miss stats
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl == 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        """Drop every entry carrying ``tag``; returns how many were dropped."""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class EntityCache(TTLCache):
+    """Process-wide cache of ClaimCenter responses keyed by URL.
+
+    TTLs are per resource: policy-level data (policy, coverages,
+    endorsements) changes far less often than claim-level data. Entries are
+    tagged with the claim_id/policy_id in their URL for invalidation.
+    Expired entries are kept so they can be revalidated with their ETag.
+    """
+
+    def __init__(self, maxsize=10000, claim_ttl=30, policy_ttl=300):
+        super().__init__(maxsize=maxsize, keep_stale=True)
+        self.ttls = {"claims": claim_ttl, "policies": policy_ttl}
+
+    @staticmethod
+    def _resource(url):
+        # /claims/<id>[/documents|/injuries] or /policies/<id>[/coverages|/endorsements]
+        parts = urlsplit(url).path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] in ("claims", "policies"):
+            return parts[0], parts[1]
+        return None, None
+
+    def put(self, url, fetched):
+        kind, entity_id = self._resource(url)
+        if kind is None or fetched.status_code != 200:
+            return
+        # Don't pin "not found" bodies; ClaimCenter reports them with a 200
+        if isinstance(fetched.data, dict) and "error" in fetched.data:
+            return
+        tags = [(kind, entity_id)]
+        if urlsplit(url).query:
+            # Composite (?expand=) responses are served per entity once split;
+            # they are kept to be revalidated, and go with the policy they embed
+            if not fetched.etag:
+                return
+            policy_id = fetched.data.get("policy_id") if isinstance(fetched.data, dict) else None
+            if policy_id:
+                tags.append(("policies", policy_id))
+        self.set(url, fetched, ttl=self.ttls[kind], tags=tags)
+
+    def invalidate_entity(self, claim_id=None, policy_id=None):
+        dropped = 0
+        if claim_id:
+            dropped += self.invalidate(("claims", claim_id))
+        if policy_id:
+            dropped += self.invalidate(("policies", policy_id))
+        return dropped
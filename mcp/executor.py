@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from steps import GRAPH, StepContext
+from telemetry import span
+
+
+def closure(graph, actions):
+    """{node: set of nodes it requires} for every node ``actions`` need."""
+    nodes = {}
+    stack = list(actions)
+    while stack:
+        name = stack.pop()
+        if name not in nodes:
+            nodes[name] = set(graph[name].requires)
+            stack.extend(graph[name].requires)
+    return nodes
+
+
+class StepExecutor:
+    """Runs planned actions over the step graph on a shared thread pool.
+
+    Each node is submitted as soon as the nodes it requires have finished, so
+    the wall-clock time of an orchestration is its critical path rather than
+    the sum of its upstream calls. With max_workers=1 it degrades to the old
+    sequential behaviour. ``pools`` ({service: executor}) runs the nodes of
+    those services elsewhere, so slow calls such as ClaimLens long-polls
+    don't hold step workers.
+    """
+
+    def __init__(self, max_workers=8, graph=GRAPH, pools=None):
+        self.graph = graph
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mcp-step"
+        )
+        self.pools = pools or {}
+
+    def nodes(self, actions):
+        """Every graph node needed to run ``actions``."""
+        return set(closure(self.graph, actions))
+
+    def _run_node(self, name, claim_id, step, results, fetch):
+        node = self.graph[name]
+        ctx = StepContext(
+            claim_id, step, {dep: results[dep] for dep in node.requires}
+        )
+        with span("step", metric="mcp_step_duration_seconds", action=name):
+            fetched = None
+            path = node.path(ctx) if node.path else None
+            if path:
+                fetched = fetch(node.service, path)
+            return node.build(ctx, fetched)
+
+    def iter_completed(self, claim_id, actions, fetch):
+        """Execute ``actions`` ({action: planned step}), yielding
+        ``(action, output)`` for each planned action with an output as soon
+        as it finishes. ``fetch(service, request)`` sends a node's request
+        (see steps.Node) and returns a Fetched."""
+        pending = closure(self.graph, actions)
+        results = {}
+        running = {}
+
+        def submit_ready():
+            for name in [n for n, deps in pending.items() if not deps]:
+                del pending[name]
+                pool = self.pools.get(self.graph[name].service, self.pool)
+                # Carry the request's context (request id, trace) into the worker
+                future = pool.submit(
+                    contextvars.copy_context().run,
+                    self._run_node, name, claim_id, actions.get(name, {}),
+                    results, fetch,
+                )
+                running[future] = name
+
+        submit_ready()
+        try:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    for deps in pending.values():
+                        deps.discard(name)
+                    finished.append(name)
+                # Start the next nodes before handing results to the consumer
+                submit_ready()
+                for name in finished:
+                    if name in actions and results[name] is not None:
+                        yield name, results[name]
+        finally:
+            for future in running:
+                future.cancel()
+
+    def run(self, claim_id, actions, fetch):
+        """Like ``iter_completed``, but return the outputs in graph order."""
+        outputs = dict(self.iter_completed(claim_id, actions, fetch))
+        return [outputs[name] for name in self.graph if name in outputs]
+
+
+class AsyncStepExecutor:
+    """asyncio counterpart of StepExecutor for the async orchestrator.
+
+    Every node is a task that awaits the tasks of the nodes it requires, so
+    an orchestration waits on its critical path without holding a thread.
+    ``fetch`` is a coroutine function taking ``(service, request)``.
+    """
+
+    def __init__(self, graph=GRAPH):
+        self.graph = graph
+
+    def nodes(self, actions):
+        """Every graph node needed to run ``actions``."""
+        return set(closure(self.graph, actions))
+
+    async def _run_node(self, name, claim_id, step, tasks, fetch):
+        node = self.graph[name]
+        ctx = StepContext(
+            claim_id, step, {dep: await tasks[dep] for dep in node.requires}
+        )
+        with span("step", metric="mcp_step_duration_seconds", action=name):
+            fetched = None
+            path = node.path(ctx) if node.path else None
+            if path:
+                fetched = await fetch(node.service, path)
+            return node.build(ctx, fetched)
+
+    async def iter_completed(self, claim_id, actions, fetch):
+        """Execute ``actions``, yielding ``(action, output)`` for each planned
+        action with an output as soon as it finishes, as
+        StepExecutor.iter_completed does."""
+        pending = closure(self.graph, actions)
+        tasks = {}
+        # Create tasks requirements first, so every node can await its own
+        while pending:
+            for name in [n for n, deps in pending.items() if deps <= tasks.keys()]:
+                del pending[name]
+                tasks[name] = asyncio.ensure_future(
+                    self._run_node(name, claim_id, actions.get(name, {}), tasks, fetch)
+                )
+        running = set(tasks.values())
+        try:
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for name in [n for n in self.graph if tasks.get(n) in done]:
+                    output = tasks[name].result()
+                    if name in actions and output is not None:
+                        yield name, output
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def run(self, claim_id, actions, fetch):
+        """Like ``iter_completed``, but return the outputs in graph order."""
+        outputs = {name: output async for name, output in self.iter_completed(claim_id, actions, fetch)}
+        return [outputs[name] for name in self.graph if name in outputs]
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class RequestFetcher:
+    """Per-orchestration memo of upstream responses keyed by URL.
+
+    Every step goes through ``get``; the first caller for a URL performs the
+    fetch and concurrent callers for the same URL wait on its result instead
+    of issuing their own request. Failed fetches are not memoized. When a
+    shared ``cache`` is given it is consulted before going upstream and
+    filled with what comes back; an expired copy with an ETag is revalidated
+    with ``fetch(url, etag=...)`` and reused if the upstream answers 304.
+
+    URLs for which ``share(url)`` is true are delegated to the ``shared``
+    fetcher instead, so several fetchers (e.g. the claims of one batch) dedupe
+    those URLs together; they are counted in the shared fetcher's stats.
+    """
+
+    def __init__(self, fetch, cache=None, shared=None, share=None):
+        self._fetch = fetch
+        self._cache = cache
+        self._shared = shared
+        self._share = share
+        self._lock = threading.Lock()
+        self._memo = {}
+        self.upstream_calls = 0
+        self.saved_calls = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+
+    def get(self, url):
+        if self._shared is not None and self._share(url):
+            return self._shared.get(url)
+        with self._lock:
+            future = self._memo.get(url)
+            if future is not None:
+                self.saved_calls += 1
+                owner = False
+            else:
+                future = self._memo[url] = Future()
+                owner = True
+
+        if owner:
+            try:
+                future.set_result(self._load(url))
+            except BaseException as e:
+                with self._lock:
+                    del self._memo[url]
+                future.set_exception(e)
+        return future.result()
+
+    def prime(self, url, fetched):
+        """Seed the memo (and cache) with a response obtained some other way,
+        e.g. split out of a composite request."""
+        if self._shared is not None and self._share(url):
+            return self._shared.prime(url, fetched)
+        with self._lock:
+            if url in self._memo:
+                return
+            future = self._memo[url] = Future()
+        future.set_result(fetched)
+        if self._cache is not None:
+            self._cache.put(url, fetched)
+
+    def _load(self, url):
+        stale = None
+        if self._cache is not None:
+            cached = self._cache.get(url)
+            if cached is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                    self.saved_calls += 1
+                return cached
+            stale = self._cache.get_stale(url)
+        with self._lock:
+            self.upstream_calls += 1
+        if stale is not None and stale.etag:
+            fetched = self._fetch(url, etag=stale.etag)
+            if fetched.status_code == 304:
+                with self._lock:
+                    self.revalidated += 1
+                fetched = stale
+        else:
+            fetched = self._fetch(url)
+        if self._cache is not None:
+            self._cache.put(url, fetched)
+        return fetched
+
+    def stats(self):
+        with self._lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "upstream_calls_saved": self.saved_calls,
+                "cache_hits": self.cache_hits,
+                "revalidated": self.revalidated,
+            }
+
+
+class AsyncRequestFetcher:
+    """asyncio counterpart of RequestFetcher: ``fetch`` is a coroutine
+    function and concurrent steps asking for the same URL await one task.
+    Everything runs on the event loop thread, so there are no locks."""
+
+    def __init__(self, fetch, cache=None):
+        self._fetch = fetch
+        self._cache = cache
+        self._memo = {}
+        self.upstream_calls = 0
+        self.saved_calls = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+
+    async def get(self, url):
+        task = self._memo.get(url)
+        if task is not None:
+            self.saved_calls += 1
+        else:
+            task = self._memo[url] = asyncio.ensure_future(self._load(url))
+            task.add_done_callback(lambda t: self._forget_failed(url, t))
+        # One waiter being cancelled must not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _forget_failed(self, url, task):
+        if (task.cancelled() or task.exception() is not None) and self._memo.get(url) is task:
+            del self._memo[url]
+
+    def prime(self, url, fetched):
+        """Seed the memo (and cache), e.g. from a composite response."""
+        if url in self._memo:
+            return
+        future = self._memo[url] = asyncio.get_running_loop().create_future()
+        future.set_result(fetched)
+        if self._cache is not None:
+            self._cache.put(url, fetched)
+
+    async def _load(self, url):
+        stale = None
+        if self._cache is not None:
+            cached = self._cache.get(url)
+            if cached is not None:
+                self.cache_hits += 1
+                self.saved_calls += 1
+                return cached
+            stale = self._cache.get_stale(url)
+        self.upstream_calls += 1
+        if stale is not None and stale.etag:
+            fetched = await self._fetch(url, etag=stale.etag)
+            if fetched.status_code == 304:
+                self.revalidated += 1
+                fetched = stale
+        else:
+            fetched = await self._fetch(url)
+        if self._cache is not None:
+            self._cache.put(url, fetched)
+        return fetched
+
+    def stats(self):
+        return {
+            "upstream_calls": self.upstream_calls,
+            "upstream_calls_saved": self.saved_calls,
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+        }
+
+
+def merge_stats(totals, stats):
+    """Add one fetcher's ``stats`` into ``totals``."""
+    for key, value in stats.items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
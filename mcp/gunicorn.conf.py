@@ -0,0 +1,31 @@
+"""Gunicorn settings for SERVER_MODE=prod: ``gunicorn -c gunicorn.conf.py orchestrator:app``.
+
+The entity and plan caches, connection pools and metrics are per process,
+and ``POST /cache/invalidate`` and ``/plan-cache/flush`` only reach the
+worker that serves them, so the orchestrator runs one worker by default. It
+waits on upstreams rather than computing, so it scales with threads (or the
+async orchestrator) instead.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8002')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", "1"))
+# orchestrator.py sizes its upstream connection pools from this too
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+worker_class = "gthread"
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+# Streaming batches keep a request open for long; gthread workers only need
+# to heartbeat within this, not finish requests
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Seconds in-flight requests get to finish after SIGTERM
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "20"))
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")  # "-" for stdout
+
+# Planner regexes, intent tables and module code are built once and shared
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Keep the collector out of the preloaded objects so workers share them
+    gc.freeze()
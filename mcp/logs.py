@@ -0,0 +1,152 @@
+"""Structured, non-blocking logging for the MCP service.
+
+Records are handed to a queue and formatted/written as JSON lines by a
+background listener thread, so request threads never wait on stdout. Full
+payload dumps go to the ``mcp.payload`` logger at DEBUG: when that level is
+off they cost one ``isEnabledFor`` check, and when it is on only a sampled
+fraction of requests log them. Every record carries the request id.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+from flask import g, request
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+payload_sampled_var = contextvars.ContextVar("payload_sampled", default=False)
+
+log = logging.getLogger("mcp")
+payload_log = logging.getLogger("mcp.payload")
+
+_listener = None
+_sample_rate = 1.0
+
+
+class Payload:
+    """Defers ``json.dumps`` until the record is actually formatted."""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(self.obj, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _PayloadSampler(logging.Filter):
+    def filter(self, record):
+        return payload_sampled_var.get()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats in the calling thread; leave that to the
+    # listener and only capture what can't wait (the request id)
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key in getattr(record, "fields", ()):
+            entry[key] = record.__dict__[key]
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def fields(**values):
+    """``extra=`` for structured fields: log.info("msg", extra=fields(a=1))."""
+    return {"fields": tuple(values), **values}
+
+
+def setup_logging(level="INFO", payload_sample_rate=1.0, stream=None):
+    """(Re)configure the ``mcp`` loggers; safe to call more than once."""
+    global _listener, _sample_rate
+    if _listener is not None:
+        _listener.stop()
+    _sample_rate = payload_sample_rate
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+
+    log.handlers[:] = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    payload_log.filters[:] = [_PayloadSampler()]
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # Threads don't survive fork(); a preloading server (gunicorn) forks its
+    # workers after setup_logging, so give each child its own queue/listener
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in log.handlers:
+        if isinstance(handler, _DeferredQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def flush_logging():
+    """Drain the queue (stops and restarts the listener thread)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def start_request(request_id=None):
+    request_id_var.set(request_id or uuid.uuid4().hex[:16])
+    payload_sampled_var.set(random.random() < _sample_rate)
+    return request_id_var.get()
+
+
+def init_app(app):
+    """Request-id correlation for a Flask app: honours an incoming
+    X-Request-ID and echoes it on the response."""
+
+    @app.before_request
+    def _begin():
+        g.request_id = start_request(request.headers.get("X-Request-ID"))
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _end(response):
+        response.headers["X-Request-ID"] = g.get("request_id", "-")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra=fields(duration_ms=round((time.perf_counter() - g.request_started) * 1000, 2)),
+            )
+        return response
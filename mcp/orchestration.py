@@ -0,0 +1,225 @@
+"""Request handling shared by orchestrator.py (Flask, threads) and
+async_orchestrator.py (aiohttp).
+
+Settings, request parsing and planning, the composite prefetch, ClaimLens
+job polling and the response bodies live here. Nothing in this module talks
+to an upstream: each server makes those calls itself, blocking or awaited,
+around these helpers.
+"""
+import json
+import logging
+import os
+import time
+
+import telemetry
+from cache import EntityCache
+from logs import Payload, fields, log, payload_log, setup_logging
+from planner import plan, plan_cache
+from steps import Fetched, composite_path, planned_actions, split_composite
+from upstream import UpstreamClient, UpstreamError, client_from_env
+
+# Fetch everything a plan needs from ClaimCenter in one ?expand= request
+USE_COMPOSITE = os.environ.get("CLAIMCENTER_COMPOSITE", "1") == "1"
+# Seconds an orchestration waits for a ClaimLens analysis job before
+# returning it as still in progress. Keep it under the chat UI's 15 s read
+# timeout: a stream sends nothing while its only step is waiting
+ANALYSIS_WAIT = float(os.environ.get("MCP_ANALYSIS_WAIT", "10"))
+# Longest single long-poll, kept under the ClaimLens read timeout
+ANALYSIS_POLL = 10.0
+
+
+def configure_logging():
+    """MCP_LOG_LEVEL=DEBUG logs every upstream call; full payloads are logged
+    for a MCP_PAYLOAD_LOG_SAMPLE_RATE fraction of requests on top of that."""
+    setup_logging(
+        level=os.environ.get("MCP_LOG_LEVEL", "INFO"),
+        payload_sample_rate=float(os.environ.get("MCP_PAYLOAD_LOG_SAMPLE_RATE", "0.1")),
+    )
+
+
+def upstream_clients(pool_size, claimlens_pool_size=None, client_class=UpstreamClient):
+    """The ClaimCenter and ClaimLens clients, with ``pool_size`` connections
+    each unless ClaimLens gets its own. Timeouts/retries/breaker settings
+    come from CLAIMCENTER_* and CLAIMLENS_*."""
+    claimcenter = client_from_env(
+        "ClaimCenter", "CLAIMCENTER", "http://claimcenter-api:8080",
+        pool_size=pool_size, read_timeout=5.0, environ=os.environ,
+        client_class=client_class,
+    )
+    claimlens = client_from_env(
+        "ClaimLens", "CLAIMLENS", "http://claimlens-api:5001",
+        pool_size=claimlens_pool_size or pool_size, read_timeout=30.0, environ=os.environ,
+        client_class=client_class,
+    )
+    return claimcenter, claimlens
+
+
+def entity_cache_from_env():
+    """Shared across requests; bounded by entry count, TTLs in seconds."""
+    return EntityCache(
+        maxsize=int(os.environ.get("MCP_CACHE_SIZE", "10000")),
+        claim_ttl=float(os.environ.get("MCP_CACHE_CLAIM_TTL", "30")),
+        policy_ttl=float(os.environ.get("MCP_CACHE_POLICY_TTL", "300")),
+    )
+
+
+def revalidation_headers(etag):
+    return {"If-None-Match": etag} if etag else None
+
+
+def log_fetch(url, fetched):
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Upstream GET %s -> %s", url, fetched.status_code)
+        payload_log.debug("Data received from %s: %s", url, Payload(fetched.data))
+
+
+def next_poll(fetched, deadline, now):
+    """Path of the next long-poll for a submitted ClaimLens job, or None once
+    it has finished or the wait (``deadline``, against ``now``) has run out.
+    Resubmitting is safe: ClaimLens hands back the running job, or the cached
+    result, for the same documents."""
+    if fetched.status_code not in (200, 202) or not isinstance(fetched.data, dict):
+        return None
+    if fetched.data.get("status") not in ("queued", "running"):
+        return None
+    remaining = deadline - now
+    if remaining <= 0:
+        return None
+    return f"/jobs/{fetched.data['job_id']}?wait={min(remaining, ANALYSIS_POLL):.1f}"
+
+
+def composite_url(claimcenter, entity_cache, claim_id, nodes):
+    """URL of the one ClaimCenter request covering the plan's reads, or None
+    when there is nothing to combine or the claim is cached (and the rest
+    likely too)."""
+    path = composite_path(claim_id, nodes)
+    if path is None or claimcenter.url(f"/claims/{claim_id}") in entity_cache:
+        return None
+    return claimcenter.url(path)
+
+
+def prime_composite(fetcher, claimcenter, claim_id, composite):
+    """Serve the plan's ClaimCenter reads from the composite response by
+    priming the fetcher with the resources split out of it."""
+    if composite.status_code != 200 or "error" in composite.data:
+        return
+    for resource_path, data in split_composite(claim_id, composite.data):
+        fetcher.prime(claimcenter.url(resource_path), Fetched(200, data))
+
+
+def steps_result(claim_id, outputs):
+    return {
+        "claim_id": claim_id,
+        "steps_executed": [s["step"] for s in outputs],
+        "results": outputs,
+    }
+
+
+def parse_orchestrate(data, event="Orchestrate request"):
+    """Validate and plan an /orchestrate body: ``((prompt, claim_id,
+    actions), None)``, or ``(None, (error body, status))``."""
+    if not isinstance(data, dict):
+        return None, ({"error": "Request body must be a JSON object"}, 400)
+    payload_log.debug("Incoming request data: %s", Payload(data))
+
+    prompt = data.get("prompt", "")
+    claim_id = data.get("claim_id", "")
+    log.info(event, extra=fields(prompt=prompt, claim_id=claim_id))
+
+    if not prompt or not claim_id:
+        error_response = {"error": "Missing prompt or claim_id"}
+        log.warning("Rejected request: %s", error_response["error"])
+        return None, (error_response, 400)
+    # The planner normalizes the prompt and caches plans on it
+    if not isinstance(prompt, str) or not isinstance(claim_id, str):
+        error_response = {"error": "prompt and claim_id must be strings"}
+        log.warning("Rejected request: %s", error_response["error"])
+        return None, (error_response, 400)
+
+    with telemetry.span("plan"):
+        steps = plan(prompt, claim_id)
+    log.info("Planned steps", extra=fields(actions=[s["action"] for s in steps]))
+    return (prompt, claim_id, planned_actions(steps)), None
+
+
+def orchestrate_response(prompt, result, fetcher, started):
+    """The /orchestrate body for ``result`` (see steps_result), with span
+    timings when the request asked for them."""
+    final_response = {"prompt": prompt, **result, "metadata": fetcher.stats()}
+    spans = telemetry.collected_spans()
+    if spans is not None:
+        final_response["timings"] = {
+            "trace_id": telemetry.trace_id_var.get(),
+            "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            "spans": spans,
+        }
+
+    log.info(
+        "Orchestrate completed",
+        extra=fields(steps_executed=final_response["steps_executed"], **fetcher.stats()),
+    )
+    payload_log.debug("Final orchestrator response: %s", Payload(final_response))
+    return final_response
+
+
+def failure(e):
+    """Log an orchestration that raised ``e``; ``(error body, status)``."""
+    if isinstance(e, UpstreamError):
+        log.warning("Upstream error: %s", e)
+        return {"error": str(e)}, 503
+    log.error("Orchestration failed", exc_info=e)
+    return {"error": str(e)}, 500
+
+
+def stream_order(graph, actions):
+    """Planned actions in graph order; a stream line's ``index`` is the
+    position of its action in this list."""
+    return [name for name in graph if name in actions]
+
+
+def stream_step(order, name, output):
+    return json.dumps({"index": order.index(name), "action": name, "result": output}) + "\n"
+
+
+def stream_error(e):
+    body, status = failure(e)
+    return json.dumps({**body, "status": status}) + "\n"
+
+
+def stream_done(prompt, claim_id, order, outputs, fetcher):
+    log.info(
+        "Orchestrate stream completed",
+        extra=fields(steps_executed=[o["step"] for o in outputs.values()], **fetcher.stats()),
+    )
+    return json.dumps({
+        "done": True,
+        "prompt": prompt,
+        "claim_id": claim_id,
+        "steps_executed": [outputs[name]["step"] for name in order if name in outputs],
+        "metadata": fetcher.stats(),
+    }) + "\n"
+
+
+def invalidate_entities(entity_cache, data):
+    """POST /cache/invalidate: ``(body, status)``."""
+    if not isinstance(data, dict):
+        return {"error": "Request body must be a JSON object"}, 400
+    claim_id = data.get("claim_id")
+    policy_id = data.get("policy_id")
+    if not claim_id and not policy_id:
+        return {"error": "Missing claim_id or policy_id"}, 400
+
+    invalidated = entity_cache.invalidate_entity(claim_id=claim_id, policy_id=policy_id)
+    log.info(
+        "Cache invalidated",
+        extra=fields(claim_id=claim_id, policy_id=policy_id, entries=invalidated),
+    )
+    return {"invalidated": invalidated}, 200
+
+
+def flush_plans():
+    """POST /plan-cache/flush: the number of plans dropped."""
+    flushed = plan_cache.stats()["size"]
+    plan_cache.clear()
+    log.info("Plan cache flushed", extra=fields(entries=flushed))
+    return {"flushed": flushed}
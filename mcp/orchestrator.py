@@ -1,227 +1,311 @@
-from flask import Flask, request, jsonify
-import requests
-from planner import plan
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from planner import plan, plan_cache
+from executor import StepExecutor
+from fetcher import RequestFetcher, merge_stats
+from upstream import UpstreamError
+from steps import planned_actions
+from batch import BatchRunner
+from concurrent.futures import ThreadPoolExecutor
+from logs import fields, init_app, log
+from orchestration import (
+    ANALYSIS_WAIT, USE_COMPOSITE, composite_url, configure_logging, entity_cache_from_env,
+    failure, flush_plans, invalidate_entities, log_fetch, next_poll, orchestrate_response,
+    parse_orchestrate, prime_composite, revalidation_headers, steps_result, stream_done,
+    stream_error, stream_order, stream_step, upstream_clients,
+)
+import telemetry
 import json
+import os
+import threading
+import time
+
+configure_logging()
+
+
+def wants_timings():
+    """Span timings are returned when asked for with ?timings=1 or
+    "debug": true in the request body."""
+    if request.args.get("timings") == "1":
+        return True
+    body = request.get_json(silent=True)
+    return isinstance(body, dict) and body.get("debug") is True
+
 
 app = Flask(__name__)
+init_app(app)
+telemetry.init_app(app, "mcp", collect=wants_timings)
+
+# Request threads per process, as gunicorn.conf.py sets them
+REQUEST_THREADS = int(os.environ.get("GUNICORN_THREADS", "16"))
+# Step worker threads shared by every interactive orchestration in the
+# process; by default room for about four runnable steps per request thread
+MAX_WORKERS = int(os.environ.get("MCP_MAX_WORKERS", str(4 * REQUEST_THREADS)))
+# Batches get their own claim slots and step workers so they can't starve
+# interactive /orchestrate traffic
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("MCP_BATCH_MAX_IN_FLIGHT", "4"))
+BATCH_STEP_WORKERS = int(os.environ.get("MCP_BATCH_STEP_WORKERS", "4"))
+BATCH_MAX_CLAIMS = int(os.environ.get("MCP_BATCH_MAX_CLAIMS", "10000"))
+# Threads long-polling ClaimLens analysis jobs, kept off the step pool; by
+# default one per request thread and batch claim slot, as each orchestration
+# runs at most one analysis
+ANALYSIS_WORKERS = int(os.environ.get(
+    "MCP_ANALYSIS_WORKERS", str(REQUEST_THREADS + BATCH_MAX_IN_FLIGHT)
+))
+
+# Keep-alive pools sized so that every thread that can be calling an upstream
+# at once holds a connection instead of opening and discarding extra ones:
+# request threads (composite prefetch), step workers and batch claim slots
+# for ClaimCenter, analysis workers for ClaimLens
+UPSTREAM_THREADS = REQUEST_THREADS + MAX_WORKERS + BATCH_MAX_IN_FLIGHT + BATCH_STEP_WORKERS
+claimcenter, claimlens = upstream_clients(
+    pool_size=UPSTREAM_THREADS, claimlens_pool_size=ANALYSIS_WORKERS,
+)
+
+entity_cache = entity_cache_from_env()
+
+
+def fetch_url(url, etag=None):
+    fetched = claimcenter.get(url, headers=revalidation_headers(etag))
+    log_fetch(url, fetched)
+    return fetched
+
+
+def analyze(job):
+    """Submit a ClaimLens analysis job and long-poll it until it finishes or
+    ANALYSIS_WAIT runs out."""
+    deadline = time.monotonic() + ANALYSIS_WAIT
+    fetched = claimlens.post(claimlens.url("/jobs"), job)
+    path = next_poll(fetched, deadline, time.monotonic())
+    while path:
+        fetched = claimlens.get(claimlens.url(path))
+        path = next_poll(fetched, deadline, time.monotonic())
+    return fetched
+
+
+def step_fetch(fetcher):
+    """Step executor ``fetch``: ClaimCenter reads go through the request's
+    fetcher, analysis jobs to ClaimLens."""
 
-CLAIMCENTER_BASE = "http://claimcenter-api:8080"
-CLAIMLENS_BASE = "http://claimlens-api:5001"
+    def fetch(service, request):
+        if service == "claimlens":
+            return analyze(request)
+        return fetcher.get(claimcenter.url(request))
+
+    return fetch
+
+
+analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="mcp-analysis")
+executor = StepExecutor(max_workers=MAX_WORKERS, pools={"claimlens": analysis_pool})
+batch_executor = StepExecutor(max_workers=BATCH_STEP_WORKERS, pools={"claimlens": analysis_pool})
+batch_runner = BatchRunner(max_in_flight=BATCH_MAX_IN_FLIGHT)
+
+
+def prefetch(claim_id, actions, fetcher, step_executor):
+    """Serve the plan's ClaimCenter reads from one composite request."""
+    url = composite_url(claimcenter, entity_cache, claim_id, step_executor.nodes(actions))
+    if url is None:
+        return
+    with telemetry.span("prefetch"):
+        composite = fetcher.get(url)
+    prime_composite(fetcher, claimcenter, claim_id, composite)
+
+
+def run_steps(claim_id, actions, fetcher, step_executor=None):
+    step_executor = step_executor or executor
+    if USE_COMPOSITE:
+        prefetch(claim_id, actions, fetcher, step_executor)
+    return steps_result(claim_id, step_executor.run(claim_id, actions, step_fetch(fetcher)))
 
 
 @app.route("/orchestrate", methods=["POST"])
 def orchestrate():
-    print("=== ORCHESTRATOR REQUEST ===")
-    data = request.json
-    print(f"Incoming request data: {json.dumps(data, indent=2)}")
+    parsed, error = parse_orchestrate(request.get_json(silent=True))
+    if error:
+        return jsonify(error[0]), error[1]
+    prompt, claim_id, actions = parsed
+
+    # Memo shared by all steps of this request, so a URL is fetched once
+    fetcher = RequestFetcher(fetch_url, cache=entity_cache)
 
-    prompt = data.get("prompt", "")
-    claim_id = data.get("claim_id", "")
-    print(f"Extracted - Prompt: '{prompt}', Claim ID: '{claim_id}'")
-
-    if not prompt or not claim_id:
-        error_response = {"error": "Missing prompt or claim_id"}
-        print(f"ERROR: {error_response}")
-        return jsonify(error_response), 400
-
-    steps = plan(prompt, claim_id)
-    print(f"Planned steps: {json.dumps(steps, indent=2)}")
-
-
-    outputs = []
-    claim = {}
-    policy = {}
-
-    url = f"{CLAIMCENTER_BASE}/claims/{claim_id}"
-    print(f"Making request to: {url}")
-    claim_resp = requests.get(url)
-    print(f"Response status: {claim_resp.status_code}")
-    claim = claim_resp.json()
-    policy_id = claim.get("policy_id", "")
-    
-    
     try:
-        for i, step in enumerate(steps):
-            action = step["action"]
-            print(f"\n--- Executing Step {i+1}: {action} ---")
-
-            if action == "get_claim":
-                url = f"{CLAIMCENTER_BASE}/claims/{claim_id}"
-                print(f"Making request to: {url}")
-                claim_resp = requests.get(url)
-                print(f"Response status: {claim_resp.status_code}")
-                claim = claim_resp.json()
-                policy_id = claim.get("policy_id", "")
-                print(f"Claim data received: {json.dumps(claim, indent=2)}")
-                outputs.append({"step": "Claim retrieved", "data": claim})
-
-            elif action == "get_policy":
-                policy_id = claim.get("policy_id")
-                print(f"Policy ID from claim: {policy_id}")
-                if policy_id:
-                    url = f"{CLAIMCENTER_BASE}/policies/{policy_id}"
-                    print(f"Making request to: {url}")
-                    policy_resp = requests.get(url)
-                    print(f"Response status: {policy_resp.status_code}")
-                    policy = policy_resp.json()
-                    print(f"Policy data received: {json.dumps(policy, indent=2)}")
-                    outputs.append({"step": "Policy details fetched", "data": policy})
-
-            elif action == "get_policy_coverages":
-                if policy_id:
-                    url = f"{CLAIMCENTER_BASE}/policies/{policy_id}/coverages"
-                    print(f"Making request to: {url}")
-                    cov_resp = requests.get(url)
-                    print(f"Response status: {cov_resp.status_code}")
-                    coverage_data = cov_resp.json()
-                    print(
-                        f"Coverage data received: {json.dumps(coverage_data, indent=2)}"
-                    )
-                    outputs.append(
-                        {"step": "Policy coverages fetched", "data": coverage_data}
-                    )
-                else:
-                    print("ERROR: No policy_id found for coverage lookup")
-                    outputs.append(
-                        {
-                            "step": "Coverage lookup failed",
-                            "message": "No policy_id found.",
-                        }
-                    )
-
-            elif action == "get_policy_endorsements":
-                if policy_id:
-                    url = f"{CLAIMCENTER_BASE}/policies/{policy_id}/endorsements"
-                    print(f"Making request to: {url}")
-                    end_resp = requests.get(url)
-                    print(f"Response status: {end_resp.status_code}")
-                    endorsement_data = end_resp.json()
-                    print(
-                        f"Endorsement data received: {json.dumps(endorsement_data, indent=2)}"
-                    )
-                    outputs.append(
-                        {
-                            "step": "Policy endorsements fetched",
-                            "data": endorsement_data,
-                        }
-                    )
-                else:
-                    print("ERROR: No policy_id found for endorsement lookup")
-                    outputs.append(
-                        {
-                            "step": "Endorsement lookup failed",
-                            "message": "No policy_id found.",
-                        }
-                    )
-
-            elif action == "get_documents":
-                url = f"{CLAIMCENTER_BASE}/claims/{claim_id}/documents"
-                print(f"Making request to: {url}")
-                doc_resp = requests.get(url)
-                print(f"Response status: {doc_resp.status_code}")
-                doc_data = doc_resp.json()
-                print(f"Document data received: {json.dumps(doc_data, indent=2)}")
-                outputs.append({"step": "Documents retrieved", "data": doc_data})
-
-            elif action == "get_injuries":
-                url = f"{CLAIMCENTER_BASE}/claims/{claim_id}/injuries"
-                print(f"Making request to: {url}")
-                injury_resp = requests.get(url)
-                print(f"Response status: {injury_resp.status_code}")
-                injury_data = injury_resp.json()
-                print(f"Injury data received: {json.dumps(injury_data, indent=2)}")
-                outputs.append({"step": "Injuries retrieved", "data": injury_data})
-
-            elif action == "get_claim_loss_date":
-                loss_date = claim.get("loss_date", "Not found")
-                print(f"Loss date extracted: {loss_date}")
-                outputs.append({"step": "Loss Date", "data": loss_date})
-
-            elif action == "get_accident_location":
-                location = claim.get("accident_details", {}).get("location", {})
-                print(f"Accident location extracted: {json.dumps(location, indent=2)}")
-                outputs.append({"step": "Accident Location", "data": location})
-
-            elif action == "get_accident_injuries":
-                injuries = claim.get("accident_details", {}).get("injuries", [])
-                print(f"Accident injuries extracted: {json.dumps(injuries, indent=2)}")
-                outputs.append({"step": "Injury Details", "data": injuries})
-
-            # elif action == "get_policy_effective_date":
-            #     effective_date = policy.get("effective_date", "Not found")
-            #     print(f"Policy effective date extracted: {effective_date}")
-            #     outputs.append({
-            #         "step": "Policy Effective Date",
-            #         "data": effective_date
-            #     })
-
-            # elif action == "get_policy_expiration_date":
-            #     expiration_date = policy.get("expiration_date", "Not found")
-            #     print(f"Policy expiration date extracted: {expiration_date}")
-            #     outputs.append({
-            #         "step": "Policy Expiration Date",
-            #         "data": expiration_date
-            #     })
-
-            elif action == "get_policy_period":
-                period_data = f"From {policy.get('effective_date', 'N/A')} to {policy.get('expiration_date', 'N/A')}"
-                print(f"Policy period extracted: {json.dumps(period_data, indent=2)}")
-                outputs.append({"step": "Policy Period", "data": period_data})
-
-            elif action == "get_policy_premium":
-                premium = f"${policy.get('premium', 0):,.2f}"
-                print(f"Policy premium extracted: {premium}")
-                outputs.append({"step": "Policy Premium", "data": premium})
-
-            elif action == "get_vehicle_details":
-                url = f"{CLAIMCENTER_BASE}/policies/{policy_id}"
-                print(f"Making request to: {url}")
-                vehicle_resp = requests.get(url)
-                if vehicle_resp.status_code != 200:
-                    raise Exception(
-                        f"Failed to fetch vehicle details, status code: {vehicle_resp.status_code}"
-                    )
-                print(f"Vehicle details response status: {vehicle_resp.status_code}")
-                vehicle_data = vehicle_resp.json().get("vehicle_details", {})
-                if not vehicle_data:
-                    raise Exception("No vehicle details found in policy response")
-                print(f"Vehicle data received: {json.dumps(vehicle_data, indent=2)}")
-                outputs.append(
-                    {"step": "Vehicle details fetched", "data": vehicle_data}
-                )
-
-            elif action == "unsupported":
-                print(f"Unsupported action with message: {step['message']}")
-                outputs.append(
-                    {
-                        "step": "Unsupported prompt",
-                        "message": step["message"],
-                        "data": "N/A",
-                    }
-                )
-
-        final_response = {
+        result = run_steps(claim_id, actions, fetcher)
+    except Exception as e:
+        body, status = failure(e)
+        return jsonify(body), status
+    return jsonify(orchestrate_response(prompt, result, fetcher, g.telemetry_started))
+
+
+@app.route("/orchestrate/stream", methods=["POST"])
+def orchestrate_stream():
+    """NDJSON variant of /orchestrate: one ``{"index", "action", "result"}``
+    line per step as soon as it finishes (``index`` is its position among
+    the planned actions in graph order), then a summary line with the rest
+    of the /orchestrate response, or an ``{"error", "status"}`` line."""
+    parsed, error = parse_orchestrate(request.get_json(silent=True), "Orchestrate stream request")
+    if error:
+        return jsonify(error[0]), error[1]
+    prompt, claim_id, actions = parsed
+    order = stream_order(executor.graph, actions)
+    fetcher = RequestFetcher(fetch_url, cache=entity_cache)
+
+    def generate():
+        outputs = {}
+        try:
+            if USE_COMPOSITE:
+                prefetch(claim_id, actions, fetcher, executor)
+            for name, output in executor.iter_completed(claim_id, actions, step_fetch(fetcher)):
+                outputs[name] = output
+                yield stream_step(order, name, output)
+        except Exception as e:
+            yield stream_error(e)
+            return
+        yield stream_done(prompt, claim_id, order, outputs, fetcher)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def _parse_batch(data):
+    if not isinstance(data, dict):
+        return None, ({"error": "Request body must be a JSON object"}, 400)
+    prompt = data.get("prompt", "")
+    claim_ids = data.get("claim_ids") or []
+    if not prompt or not claim_ids:
+        return None, ({"error": "Missing prompt or claim_ids"}, 400)
+    if not isinstance(prompt, str):
+        return None, ({"error": "prompt must be a string"}, 400)
+    if not isinstance(claim_ids, list) or not all(isinstance(c, str) and c for c in claim_ids):
+        return None, ({"error": "claim_ids must be a list of claim id strings"}, 400)
+    if len(claim_ids) > BATCH_MAX_CLAIMS:
+        return None, ({"error": f"At most {BATCH_MAX_CLAIMS} claim_ids per batch"}, 400)
+    max_in_flight = data.get("max_in_flight")
+    if max_in_flight is None:
+        max_in_flight = BATCH_MAX_IN_FLIGHT
+    # bool is an int subclass; True would silently mean a window of 1
+    if isinstance(max_in_flight, bool) or not isinstance(max_in_flight, int) or max_in_flight < 1:
+        return None, ({"error": "max_in_flight must be a positive integer"}, 400)
+    return (prompt, claim_ids, max_in_flight), None
+
+
+def _batch(prompt, claim_ids, max_in_flight):
+    """Plan once, then run every claim through the batch runner.
+
+    Returns the ``(index, result)`` iterator and a callable giving the
+    upstream call totals so far. Policy-level lookups go through one fetcher
+    shared by the whole batch, so claims on the same policy fetch it once,
+    but only those not served by a claim's composite prefetch: with
+    USE_COMPOSITE each claim gets its policy with it in one request, which
+    is fewer calls than a claim and a shared policy lookup.
+    """
+    actions = planned_actions(plan(prompt, ""))
+    log.info(
+        "Batch started",
+        extra=fields(prompt=prompt, claims=len(claim_ids), actions=list(actions)),
+    )
+    policies = RequestFetcher(fetch_url, cache=entity_cache)
+    totals = {}
+    totals_lock = threading.Lock()
+
+    def run_claim(claim_id):
+        fetcher = RequestFetcher(
+            fetch_url, cache=entity_cache, shared=policies,
+            share=lambda url: "/policies/" in url,
+        )
+        try:
+            return run_steps(claim_id, actions, fetcher, step_executor=batch_executor)
+        except UpstreamError as e:
+            log.warning("Upstream error for claim %s: %s", claim_id, e)
+            return {"claim_id": claim_id, "error": str(e), "status": 503}
+        except Exception as e:
+            log.exception("Batch claim %s failed", claim_id)
+            return {"claim_id": claim_id, "error": str(e), "status": 500}
+        finally:
+            with totals_lock:
+                merge_stats(totals, fetcher.stats())
+
+    def stats():
+        with totals_lock:
+            return merge_stats(dict(totals), policies.stats())
+
+    return batch_runner.iter_results(claim_ids, run_claim, max_in_flight), stats
+
+
+@app.route("/orchestrate/batch", methods=["POST"])
+def orchestrate_batch():
+    parsed, error = _parse_batch(request.get_json(silent=True))
+    if error:
+        return jsonify(error[0]), error[1]
+    prompt, claim_ids, max_in_flight = parsed
+
+    results, stats = _batch(prompt, claim_ids, max_in_flight)
+    ordered = [None] * len(claim_ids)
+    for index, result in results:
+        ordered[index] = result
+
+    return jsonify({
+        "prompt": prompt,
+        "results": ordered,
+        "errors": sum(1 for r in ordered if "error" in r),
+        "metadata": stats(),
+    })
+
+
+@app.route("/orchestrate/batch/stream", methods=["POST"])
+def orchestrate_batch_stream():
+    """NDJSON variant of /orchestrate/batch: one line per claim in completion
+    order (with its index in claim_ids), then a summary line."""
+    parsed, error = _parse_batch(request.get_json(silent=True))
+    if error:
+        return jsonify(error[0]), error[1]
+    prompt, claim_ids, max_in_flight = parsed
+
+    def generate():
+        results, stats = _batch(prompt, claim_ids, max_in_flight)
+        errors = 0
+        for index, result in results:
+            errors += "error" in result
+            yield json.dumps({"index": index, **result}) + "\n"
+        yield json.dumps({
+            "done": True,
             "prompt": prompt,
-            "claim_id": claim_id,
-            "steps_executed": [s["step"] for s in outputs],
-            "results": outputs,
-        }
+            "claims": len(claim_ids),
+            "errors": errors,
+            "metadata": stats(),
+        }) + "\n"
 
-        print("\n=== FINAL ORCHESTRATOR RESPONSE ===")
-        print(json.dumps(final_response, indent=2))
-        print("====================================")
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-        return jsonify(final_response)
 
-    except Exception as e:
-        error_response = {"error": str(e)}
-        print(f"\n=== ORCHESTRATOR ERROR ===")
-        print(f"Exception: {str(e)}")
-        print(f"Error response: {json.dumps(error_response, indent=2)}")
-        print("=========================")
-        return jsonify(error_response), 500
+@app.route("/cache/invalidate", methods=["POST"])
+def invalidate_cache():
+    body, status = invalidate_entities(entity_cache, request.get_json(silent=True))
+    return jsonify(body), status
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify(entity_cache.stats())
+
+
+@app.route("/plan-cache/stats")
+def plan_cache_stats():
+    return jsonify(plan_cache.stats())
+
+
+@app.route("/plan-cache/flush", methods=["POST"])
+def flush_plan_cache():
+    return jsonify(flush_plans())
+
+
+@app.route("/upstream/stats")
+def upstream_stats():
+    return jsonify({"claimcenter": claimcenter.stats(), "claimlens": claimlens.stats()})
 
 
 if __name__ == "__main__":
-    print("Starting MCP Orchestrator on port 8002...")
-    app.run(host="0.0.0.0", port=8002,debug=True)
+    log.info("Starting MCP Orchestrator on port 8002...")
+    # Werkzeug dev server (SERVER_MODE=dev); production runs under gunicorn
+    app.run(
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8002")),
+        debug=os.environ.get("FLASK_DEBUG", "1") == "1",
+    )
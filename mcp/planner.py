@@ -1,66 +1,157 @@
+import os
+import re
+from typing import NamedTuple
+
+from cache import TTLCache
+
+UNSUPPORTED = {"action": "unsupported", "message": "I don't understand that yet."}
+
+
+class Intent(NamedTuple):
+    action: str
+    keywords: tuple   # substrings of the normalized prompt that trigger it
+    requires: tuple = ()  # actions it implies, resolved transitively
+
+
+# Declarative intent table. Table order is the order actions are planned in.
+INTENTS = (
+    Intent("get_claim", ("claim", "claim details", "claim info", "claim detail")),
+    Intent("get_policy", ("policy details", "policy info"), requires=("get_claim",)),
+    Intent(
+        "get_policy_coverages",
+        ("coverages", "coverage", "policy coverages", "coverage details"),
+        requires=("get_policy",),
+    ),
+    Intent(
+        "get_policy_endorsements",
+        ("endorsements", "policy endorsements"),
+        requires=("get_policy",),
+    ),
+    Intent("get_documents", ("documents",)),
+    Intent("get_claim_loss_date", ("date of loss", "loss date"), requires=("get_claim",)),
+    Intent(
+        "get_accident_location",
+        ("accident occur", "accident location"),
+        requires=("get_claim",),
+    ),
+    Intent("get_accident_injuries", ("injuries",), requires=("get_policy",)),
+    Intent("get_policy_effective_date", ("effective date",), requires=("get_policy",)),
+    Intent(
+        "get_policy_expiration_date",
+        ("expiration date", "expiry date"),
+        requires=("get_policy",),
+    ),
+    Intent(
+        "get_policy_period",
+        ("policy period", "policy effective date"),
+        requires=("get_policy",),
+    ),
+    Intent("get_policy_premium", ("premium",), requires=("get_policy",)),
+    Intent(
+        "get_vehicle_details",
+        ("vehicle", "vehicle details", "vehicle info"),
+        requires=("get_policy",),
+    ),
+    Intent(
+        "analyze_claim",
+        ("analyze", "analysis", "risk score", "findings", "recommended", "next actions", "icd"),
+    ),
+)
+
+
+def _trie_pattern(words):
+    """Regex matching any of ``words``, factored by common prefix so each
+    position of the prompt walks a single trie path, preferring the longest
+    match."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(branches)})?"
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return build(trie)
+
+
+class Planner:
+    """Intent table compiled into one regex, matched in a single pass.
+
+    Matching keeps substring semantics: every keyword occurring anywhere in
+    the prompt fires, including keywords that overlap. The lookahead finds
+    the longest keyword starting at each position, and each keyword maps to
+    the actions of all keywords that are its prefixes (they match there too).
+    """
+
+    def __init__(self, intents=INTENTS):
+        self.intents = tuple(intents)
+        order = {intent.action: i for i, intent in enumerate(self.intents)}
+        requires = {intent.action: intent.requires for intent in self.intents}
+
+        def expand(action, seen):
+            if action not in seen:
+                seen.add(action)
+                for dep in requires.get(action, ()):
+                    expand(dep, seen)
+            return seen
+
+        closure = {action: frozenset(expand(action, set())) for action in requires}
+
+        triggers = {}
+        for intent in self.intents:
+            for keyword in intent.keywords:
+                triggers.setdefault(normalize(keyword), set()).update(closure[intent.action])
+        self._actions = {}
+        for keyword in triggers:
+            actions = set()
+            for end in range(1, len(keyword) + 1):
+                actions |= triggers.get(keyword[:end], set())
+            self._actions[keyword] = tuple(sorted(actions, key=order.__getitem__))
+        self._order = order
+        self._regex = re.compile(f"(?=({_trie_pattern(triggers)}))")
+
+    def plan(self, prompt, claim_id=None):
+        found = set()
+        for match in self._regex.finditer(normalize(prompt)):
+            found.update(self._actions[match.group(1)])
+        if not found:
+            return [dict(UNSUPPORTED)]
+        return [{"action": action} for action in sorted(found, key=self._order.__getitem__)]
+
+
+_PUNCTUATION = re.compile(r"[\W_]+")
+
+
+def normalize(prompt):
+    """Case-fold and collapse whitespace/punctuation runs to one space, so
+    "Loss-date?" and "loss  date" plan (and cache) the same."""
+    return _PUNCTUATION.sub(" ", prompt.casefold()).strip()
+
+
+_planner = Planner()
+# Plans depend only on the normalized prompt, and adjusters ask the same
+# handful of questions over and over
+plan_cache = TTLCache(maxsize=int(os.environ.get("MCP_PLAN_CACHE_SIZE", "1024")))
+
+
+def set_intents(intents):
+    """Swap in a new intent table and flush the plans made with the old one."""
+    global _planner
+    _planner = Planner(intents)
+    plan_cache.clear()
+
+
 def plan(prompt: str, claim_id: str):
-    prompt = prompt.lower()
-    actions = set()
-    
-    if "claim" in prompt or "claim details" in prompt or "claim info" in prompt or "claim detail" in prompt:
-        actions.add("get_claim")
-
-    if "policy details" in prompt or "policy info" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-
-    if "coverages" in prompt or "coverage" in prompt or "policy coverages" in prompt or "coverage details" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_coverages")
-
-    if "endorsements" in prompt or "policy endorsements" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_endorsements")
-
-    if "injuries" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_accident_injuries")
-
-    if "documents" in prompt:
-        actions.add("get_documents")
-
-    if "date of loss" in prompt or "loss date" in prompt:
-        actions.add("get_claim")
-        actions.add("get_claim_loss_date")
-
-    if "accident occur" in prompt or "accident location" in prompt:
-        actions.add("get_claim")
-        actions.add("get_accident_location")
-
-    if "effective date" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_effective_date")
-
-    if "expiration date" in prompt or "expiry date" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_expiration_date")
-
-    if "policy period" in prompt or "policy effective date" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_period")
-
-    if "premium" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_policy_premium")
-
-    if "vehicle" in prompt or "vehicle details" in prompt or "vehicle info" in prompt:
-        actions.add("get_claim")
-        actions.add("get_policy")
-        actions.add("get_vehicle_details")
-
-    if not actions:
-        actions.add("unsupported")
-
-    return [{"action": action} if action != "unsupported" else {"action": "unsupported", "message": "I don't understand that yet."} for action in actions]
\ No newline at end of file
+    key = normalize(prompt)
+    steps = plan_cache.get(key)
+    if steps is None:
+        steps = tuple(_planner.plan(key, claim_id))
+        plan_cache.set(key, steps)
+    return [dict(step) for step in steps]
@@ -0,0 +1,254 @@
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class Fetched(NamedTuple):
+    status_code: int
+    data: Any
+    # Upstream ETag, sent back as If-None-Match to revalidate a stale copy
+    etag: Optional[str] = None
+
+
+class StepContext(NamedTuple):
+    claim_id: str
+    step: dict      # the planned step ({"action": ...}); {} for resource nodes
+    results: dict   # values of the nodes this node requires
+
+
+class Node(NamedTuple):
+    requires: tuple
+    # Request to send to ``service`` before building, or None when nothing is
+    # fetched: a ClaimCenter path, or a ClaimLens analysis job body
+    path: Optional[Callable[[StepContext], Any]]
+    # Turns the context (and the fetched response, if any) into the node value.
+    # For action nodes the value is the step output appended to the results;
+    # returning None means the step produced no output.
+    build: Callable[[StepContext, Optional[Fetched]], Any]
+    # ClaimCenter ?expand= name covering this node's fetch, so a plan can be
+    # served by one composite request
+    expand: Optional[str] = None
+    service: str = "claimcenter"
+
+
+def _policy_id(ctx):
+    return ctx.results["claim"].get("policy_id", "")
+
+
+def _policy_path(ctx):
+    policy_id = _policy_id(ctx)
+    return f"/policies/{policy_id}" if policy_id else None
+
+
+def _coverages(ctx, fetched):
+    if fetched is None:
+        return {"step": "Coverage lookup failed", "message": "No policy_id found."}
+    return {"step": "Policy coverages fetched", "data": fetched.data}
+
+
+def _endorsements(ctx, fetched):
+    if fetched is None:
+        return {"step": "Endorsement lookup failed", "message": "No policy_id found."}
+    return {"step": "Policy endorsements fetched", "data": fetched.data}
+
+
+def _vehicle_details(ctx, fetched):
+    if fetched.status_code != 200:
+        raise Exception(
+            f"Failed to fetch vehicle details, status code: {fetched.status_code}"
+        )
+    vehicle_data = fetched.data.get("vehicle_details", {})
+    if not vehicle_data:
+        raise Exception("No vehicle details found in policy response")
+    return {"step": "Vehicle details fetched", "data": vehicle_data}
+
+
+def _analysis_job(ctx):
+    documents = ctx.results["documents"]
+    return {
+        "claim_id": ctx.claim_id,
+        "documents": documents if isinstance(documents, list) else [],
+    }
+
+
+def _analysis(ctx, fetched):
+    # Error bodies may be missing or not JSON
+    job = fetched.data if isinstance(fetched.data, dict) else {}
+    if fetched.status_code == 429:
+        return {"step": "Claim analysis failed", "message": "ClaimLens is busy, ask again shortly."}
+    if fetched.status_code not in (200, 202):
+        return {
+            "step": "Claim analysis failed",
+            "message": job.get("error", f"ClaimLens answered {fetched.status_code}."),
+        }
+    if job.get("status") == "done":
+        return {"step": "Claim analysis completed", "data": job["result"]}
+    if job.get("status") == "failed":
+        return {"step": "Claim analysis failed", "message": job.get("error", "Analysis failed.")}
+    # Still queued or running after the orchestrator stopped waiting
+    return {
+        "step": "Claim analysis in progress",
+        "message": "Analysis is still running, ask again shortly.",
+        "data": {"job_id": job.get("job_id"), "status": job.get("status")},
+    }
+
+
+def _policy_period(ctx, fetched):
+    policy = ctx.results["policy"]
+    return {
+        "step": "Policy Period",
+        "data": f"From {policy.get('effective_date', 'N/A')} to {policy.get('expiration_date', 'N/A')}",
+    }
+
+
+# Step graph: claim -> policy -> coverages/endorsements/vehicle, while
+# documents and injuries only need the claim_id and the ClaimLens analysis
+# needs the documents. "claim", "policy" and "documents" are resource nodes
+# shared by the actions; every other key is a planner action.
+# Dict order is the order results are returned in, whatever order the steps
+# finish in.
+GRAPH = {
+    "claim": Node(
+        (),
+        lambda ctx: f"/claims/{ctx.claim_id}",
+        lambda ctx, fetched: fetched.data,
+    ),
+    "policy": Node(
+        ("claim",),
+        _policy_path,
+        lambda ctx, fetched: fetched.data if fetched is not None else {},
+        expand="policy",
+    ),
+    "documents": Node(
+        (),
+        lambda ctx: f"/claims/{ctx.claim_id}/documents",
+        lambda ctx, fetched: fetched.data,
+        expand="documents",
+    ),
+    "get_claim": Node(
+        ("claim",),
+        None,
+        lambda ctx, fetched: {"step": "Claim retrieved", "data": ctx.results["claim"]},
+    ),
+    "get_policy": Node(
+        ("claim", "policy"),
+        None,
+        lambda ctx, fetched: (
+            {"step": "Policy details fetched", "data": ctx.results["policy"]}
+            if _policy_id(ctx)
+            else None
+        ),
+    ),
+    "get_policy_coverages": Node(
+        ("claim",),
+        lambda ctx: f"/policies/{_policy_id(ctx)}/coverages" if _policy_id(ctx) else None,
+        _coverages,
+        expand="coverages",
+    ),
+    "get_policy_endorsements": Node(
+        ("claim",),
+        lambda ctx: f"/policies/{_policy_id(ctx)}/endorsements" if _policy_id(ctx) else None,
+        _endorsements,
+        expand="endorsements",
+    ),
+    "get_documents": Node(
+        ("documents",),
+        None,
+        lambda ctx, fetched: {"step": "Documents retrieved", "data": ctx.results["documents"]},
+    ),
+    "get_injuries": Node(
+        (),
+        lambda ctx: f"/claims/{ctx.claim_id}/injuries",
+        lambda ctx, fetched: {"step": "Injuries retrieved", "data": fetched.data},
+        expand="injuries",
+    ),
+    "get_claim_loss_date": Node(
+        ("claim",),
+        None,
+        lambda ctx, fetched: {
+            "step": "Loss Date",
+            "data": ctx.results["claim"].get("loss_date", "Not found"),
+        },
+    ),
+    "get_accident_location": Node(
+        ("claim",),
+        None,
+        lambda ctx, fetched: {
+            "step": "Accident Location",
+            "data": ctx.results["claim"].get("accident_details", {}).get("location", {}),
+        },
+    ),
+    "get_accident_injuries": Node(
+        ("claim",),
+        None,
+        lambda ctx, fetched: {
+            "step": "Injury Details",
+            "data": ctx.results["claim"].get("accident_details", {}).get("injuries", []),
+        },
+    ),
+    "get_policy_period": Node(("policy",), None, _policy_period),
+    "get_policy_premium": Node(
+        ("policy",),
+        None,
+        lambda ctx, fetched: {
+            "step": "Policy Premium",
+            "data": f"${ctx.results['policy'].get('premium', 0):,.2f}",
+        },
+    ),
+    # Fetches the policy itself so the status check stays local to the step.
+    "get_vehicle_details": Node(
+        ("claim",),
+        lambda ctx: f"/policies/{_policy_id(ctx)}",
+        _vehicle_details,
+        expand="policy",
+    ),
+    # Submitted as a ClaimLens job; identical documents reuse its cached result
+    "analyze_claim": Node(
+        ("documents",),
+        _analysis_job,
+        _analysis,
+        service="claimlens",
+    ),
+    "unsupported": Node(
+        (),
+        None,
+        lambda ctx, fetched: {
+            "step": "Unsupported prompt",
+            "message": ctx.step["message"],
+            "data": "N/A",
+        },
+    ),
+}
+
+
+def planned_actions(steps):
+    """Map planned steps to graph actions, in graph order.
+
+    Actions the graph does not know about are dropped, as the old
+    sequential loop silently skipped them.
+    """
+    by_action = {step["action"]: step for step in steps}
+    return {name: by_action[name] for name in GRAPH if name in by_action}
+
+
+def composite_path(claim_id, nodes):
+    """Path of the composite claim request covering the fetches of ``nodes``,
+    or None when it would not save a round-trip."""
+    expand = sorted({GRAPH[name].expand for name in nodes if GRAPH[name].expand})
+    if not expand:
+        return None
+    return f"/claims/{claim_id}?expand={','.join(expand)}"
+
+
+def split_composite(claim_id, claim):
+    """Yield (path, data) for the claim and each expanded resource of a
+    composite response, i.e. what the individual fetches would have returned."""
+    claim = dict(claim)
+    expanded = claim.pop("expanded", {})
+    yield f"/claims/{claim_id}", claim
+    policy_id = claim.get("policy_id", "")
+    for name, data in expanded.items():
+        if name == "policy":
+            yield f"/policies/{policy_id}", data
+        elif name in ("coverages", "endorsements"):
+            yield f"/policies/{policy_id}/{name}", data
+        else:
+            yield f"/claims/{claim_id}/{name}", data
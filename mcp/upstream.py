@@ -0,0 +1,252 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from steps import Fetched
+from telemetry import span, trace_headers
+
+RETRY_STATUSES = {502, 503, 504}
+
+
+def route_label(url):
+    """``/claims/CLM-1/documents`` -> ``/claims/{id}/documents``: upstream
+    paths alternate collection and id segments, and ids would make the
+    metric's label set unbounded."""
+    segments = urlsplit(url).path.strip("/").split("/")
+    return "/" + "/".join("{id}" if i % 2 else s for i, s in enumerate(segments))
+
+
+def record_server_time(current, headers):
+    """Keep the upstream's own handling time (its Server-Timing header) on
+    the span, next to the wall time of the call."""
+    server_timing = headers.get("Server-Timing", "")
+    if server_timing.startswith("app;dur="):
+        current.attrs["server_ms"] = float(server_timing[len("app;dur="):])
+
+
+class UpstreamError(Exception):
+    """An upstream service could not be reached or kept failing."""
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``threshold`` failures in a row the circuit opens and calls fail
+    fast for ``reset_timeout`` seconds; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that says nothing about the upstream (e.g. it was
+        cancelled) without counting it, so the next call can be the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class UpstreamClient:
+    """Pooled keep-alive HTTP client for one upstream service.
+
+    Requests are retried on transport errors (connection, timeout, truncated
+    or undecodable body) and 502/503/504 with full-jitter exponential backoff,
+    so they must be idempotent; a circuit breaker fails calls fast while the
+    upstream is down.
+    """
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        pool_size=8,
+        connect_timeout=1.0,
+        read_timeout=5.0,
+        retries=2,
+        backoff=0.1,
+        max_backoff=2.0,
+        breaker=None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+        self.session = self._make_session()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def _make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _sleep_before_retry(self, attempt):
+        time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def _send(self, method, url, headers, body):
+        """One attempt, traced as an ``upstream`` span."""
+        with span(
+            "upstream", metric="mcp_upstream_request_duration_seconds",
+            upstream=self.name, method=method, route=route_label(url),
+        ) as current:
+            current.attrs["url"] = url
+            try:
+                resp = self.session.request(
+                    method, url, json=body,
+                    headers={**trace_headers(), **(headers or {})}, timeout=self.timeout,
+                )
+            except requests.RequestException:
+                current.labels["status"] = "error"
+                raise
+            current.labels["status"] = resp.status_code
+            record_server_time(current, resp.headers)
+            return resp
+
+    def get(self, url, headers=None):
+        """GET ``url`` and return a Fetched with the decoded JSON body.
+        gzip-encoded bodies are decoded by the session."""
+        return self.request("GET", url, headers=headers)
+
+    def post(self, url, body, headers=None):
+        """POST ``body`` as JSON. Retried like a GET, so only for submissions
+        the upstream deduplicates, such as ClaimLens analysis jobs."""
+        return self.request("POST", url, body=body, headers=headers)
+
+    def request(self, method, url, body=None, headers=None):
+        """Send one idempotent request and return a Fetched with the decoded
+        JSON body."""
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open, failing fast")
+        try:
+            fetched = self._attempts(method, url, body, headers)
+        except UpstreamError:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Neither outcome (e.g. interrupted): free a half-open trial
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return fetched
+
+    def _attempts(self, method, url, body, headers):
+        """The request with its retries: a Fetched, or UpstreamError once
+        they are used up."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                self._sleep_before_retry(attempt - 1)
+            self._count("requests")
+            try:
+                resp = self._send(method, url, headers, body)
+            except requests.RequestException as e:
+                error = UpstreamError(f"{self.name} request to {url} failed: {e}")
+                continue
+            if resp.status_code in RETRY_STATUSES:
+                error = UpstreamError(
+                    f"{self.name} request to {url} failed with status {resp.status_code}"
+                )
+                continue
+            if resp.status_code == 304:
+                # The caller's copy (If-None-Match) is still current
+                return Fetched(304, None, resp.headers.get("ETag"))
+            try:
+                data = resp.json()
+            except ValueError as e:
+                if resp.status_code >= 400:
+                    # e.g. an HTML 404 page: the upstream is healthy, the
+                    # caller decides what the status means
+                    return Fetched(resp.status_code, None)
+                raise UpstreamError(f"{self.name} returned invalid JSON from {url}: {e}")
+            return Fetched(resp.status_code, data, resp.headers.get("ETag"))
+        raise error
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, circuit=self.breaker.state)
+
+
+def client_from_env(
+    name, env_prefix, default_base, pool_size, read_timeout, environ, client_class=UpstreamClient
+):
+    """Build an UpstreamClient (or ``client_class``) from ``<env_prefix>_*``
+    settings."""
+
+    def setting(key, default):
+        return environ.get(f"{env_prefix}_{key}", default)
+
+    return client_class(
+        name,
+        setting("BASE", default_base),
+        pool_size=pool_size,
+        connect_timeout=float(setting("CONNECT_TIMEOUT", "1.0")),
+        read_timeout=float(setting("READ_TIMEOUT", str(read_timeout))),
+        retries=int(setting("RETRIES", "2")),
+        breaker=CircuitBreaker(
+            threshold=int(setting("BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(setting("BREAKER_RESET", "30")),
+        ),
+    )
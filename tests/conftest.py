@@ -0,0 +1,11 @@
+"""The services import their modules (and common/'s) flat, so those
+directories go on sys.path; their module names don't clash."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for service_dir in ("common", "mcp", "claimcenter_api"):
+    path = os.path.join(ROOT, service_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,86 @@
+import pytest
+
+import cache
+from cache import EntityCache, TTLCache
+from steps import Fetched
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used():
+    lru = TTLCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    ttl = TTLCache(ttl=10)
+    ttl.set("a", 1)
+    ttl.set("b", 2, ttl=100)
+    clock[0] += 10
+    assert ttl.get("a") is None
+    assert ttl.get("b") == 2
+    assert "a" not in ttl
+    assert ttl.stats()["size"] == 1
+
+
+def test_keep_stale_keeps_expired_entries_for_revalidation(clock):
+    stale = TTLCache(ttl=10, keep_stale=True)
+    stale.set("a", 1)
+    clock[0] += 11
+    assert stale.get("a") is None
+    assert stale.get_stale("a") == 1
+    assert stale.stats()["expirations"] == 1
+
+
+def test_invalidate_drops_every_entry_with_the_tag():
+    tagged = TTLCache()
+    tagged.set("a", 1, tags=["x"])
+    tagged.set("b", 2, tags=["x", "y"])
+    tagged.set("c", 3, tags=["y"])
+    assert tagged.invalidate("x") == 2
+    assert tagged.get("a") is None and tagged.get("b") is None
+    assert tagged.get("c") == 3
+    # The tag index forgets dropped and evicted keys
+    assert tagged.invalidate("x") == 0
+    assert tagged._tags == {"y": {"c"}}
+
+
+def test_disabled_cache_stores_nothing():
+    off = TTLCache(maxsize=0)
+    off.set("a", 1)
+    assert off.get("a") is None
+    zero_ttl = TTLCache()
+    zero_ttl.set("a", 1, ttl=0)
+    assert zero_ttl.get("a") is None
+
+
+def test_entity_cache_ttls_and_invalidation(clock):
+    entities = EntityCache(claim_ttl=30, policy_ttl=300)
+    entities.put("http://cc/claims/c1", Fetched(200, {"claim_id": "c1"}))
+    entities.put("http://cc/policies/p1/coverages", Fetched(200, []))
+    clock[0] += 31
+    assert entities.get("http://cc/claims/c1") is None
+    assert entities.get("http://cc/policies/p1/coverages") is not None
+    assert entities.invalidate_entity(policy_id="p1") == 1
+
+
+def test_entity_cache_skips_errors_and_untagged_composites():
+    entities = EntityCache()
+    entities.put("http://cc/claims/c1", Fetched(200, {"error": "Claim not found"}))
+    entities.put("http://cc/claims/c2", Fetched(500, None))
+    entities.put("http://cc/claims/c3?expand=policy", Fetched(200, {"policy_id": "p1"}))
+    assert entities.stats()["size"] == 0
+
+    entities.put("http://cc/claims/c3?expand=policy", Fetched(200, {"policy_id": "p1"}, "etag"))
+    assert entities.invalidate_entity(policy_id="p1") == 1
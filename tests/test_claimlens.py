@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE = os.path.join(ROOT, "claimlens_api")
+
+
+@pytest.fixture(scope="module")
+def client():
+    # ClaimCenter's app.py is importable as "app", so load this one by path
+    if SERVICE not in sys.path:
+        sys.path.append(SERVICE)
+    spec = importlib.util.spec_from_file_location("claimlens_app", os.path.join(SERVICE, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app.test_client()
+
+
+@pytest.fixture(scope="module")
+def job_id(client):
+    response = client.post("/jobs", json={"claim_id": "claim_1", "documents": [{"filename": "report.pdf"}]})
+    return response.get_json()["job_id"]
+
+
+@pytest.mark.parametrize("wait", ["abc", "-5", "", "0.1"])
+def test_bad_or_negative_waits_do_not_fail_the_poll(client, job_id, wait):
+    response = client.get(f"/jobs/{job_id}?wait={wait}")
+    assert response.status_code == 200
+    assert response.get_json()["job_id"] == job_id
+
+
+@pytest.mark.parametrize("documents", [[1, 2], [{"filename": "a.pdf"}, "b.pdf"], [None]])
+def test_documents_that_are_not_objects_are_rejected_at_submit(client, documents):
+    for route in ("/jobs", "/analyze"):
+        response = client.post(route, json={"claim_id": "claim_1", "documents": documents})
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "documents must be a list of JSON objects"
@@ -0,0 +1,53 @@
+import pytest
+
+from conditional import ConditionalResponder
+from generate_data import generate, write
+from storage import JsonStore
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    import app
+
+    write(str(tmp_path), generate(20))
+    monkeypatch.setattr(app, "store", JsonStore(str(tmp_path)))
+    monkeypatch.setattr(app, "responses", ConditionalResponder())
+    return app.app.test_client()
+
+
+def stats():
+    import app
+
+    return app.responses.stats()
+
+
+def test_reordered_and_unknown_params_share_an_entry(client):
+    first = client.get("/claims?ids=claim_2,claim_1&expand=policy,documents")
+    second = client.get("/claims?expand=documents,policy&ids=claim_1,claim_2,claim_1&junk=1")
+    assert first.data == second.data
+    assert (stats()["size"], stats()["hits"]) == (1, 1)
+
+
+def test_search_is_keyed_by_its_clamped_filters(client):
+    client.get("/claims?status=Open&limit=5000")
+    client.get("/claims?limit=1000&status=Open&utm=x")
+    client.get("/claims?status=Closed")
+    assert (stats()["size"], stats()["hits"]) == (2, 1)
+
+
+def test_bodies_and_gzip_copies_are_bounded_by_bytes(client, monkeypatch):
+    import app
+
+    body = client.get("/claims/claim_1").data
+    monkeypatch.setattr(app, "responses", ConditionalResponder(maxbytes=3 * len(body), gzip_min_size=0))
+    gzipped = client.get("/claims/claim_1", headers={"Accept-Encoding": "gzip"}).data
+    assert stats()["bytes"] == len(body) + len(gzipped)
+    for i in range(2, 11):
+        client.get(f"/claims/claim_{i}", headers={"Accept-Encoding": "gzip"})
+        assert 0 < stats()["bytes"] <= stats()["maxbytes"]
+    assert stats()["size"] < 10
+
+    # Served but not kept when a body alone is over the limit
+    monkeypatch.setattr(app, "responses", ConditionalResponder(maxbytes=10))
+    assert client.get("/claims/claim_1").status_code == 200
+    assert (stats()["size"], stats()["bytes"]) == (0, 0)
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from executor import AsyncStepExecutor, StepExecutor
+from steps import Fetched
+
+ACTIONS = {"get_claim": {"action": "get_claim"}, "get_documents": {"action": "get_documents"}}
+# The claim comes back after the documents
+DELAYS = {"/claims/claim_1": 0.05, "/claims/claim_1/documents": 0.0}
+
+
+def response(path):
+    if path.endswith("/documents"):
+        return Fetched(200, [{"name": "report.pdf"}])
+    return Fetched(200, {"claim_id": "claim_1", "policy_id": ""})
+
+
+def test_outputs_stream_in_completion_order_and_return_in_graph_order():
+    def fetch(service, path):
+        time.sleep(DELAYS[path])
+        return response(path)
+
+    executor = StepExecutor(max_workers=4)
+    streamed = [name for name, _ in executor.iter_completed("claim_1", ACTIONS, fetch)]
+    assert streamed == ["get_documents", "get_claim"]
+    assert [o["step"] for o in executor.run("claim_1", ACTIONS, fetch)] == [
+        "Claim retrieved", "Documents retrieved",
+    ]
+
+
+def test_async_executor_streams_and_returns_like_the_threaded_one():
+    async def fetch(service, path):
+        await asyncio.sleep(DELAYS[path])
+        return response(path)
+
+    async def scenario():
+        executor = AsyncStepExecutor()
+        streamed = [name async for name, _ in executor.iter_completed("claim_1", ACTIONS, fetch)]
+        return streamed, await executor.run("claim_1", ACTIONS, fetch)
+
+    streamed, outputs = asyncio.run(scenario())
+    assert streamed == ["get_documents", "get_claim"]
+    assert outputs == StepExecutor(max_workers=4).run("claim_1", ACTIONS, lambda s, p: response(p))
+
+
+def test_nodes_of_a_service_with_its_own_pool_run_there():
+    threads = {}
+
+    def fetch(service, request):
+        threads[service] = threading.current_thread().name
+        if service == "claimlens":
+            return Fetched(200, {"job_id": "j1", "status": "done", "result": {}})
+        return response(request)
+
+    analysis_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+    executor = StepExecutor(max_workers=2, pools={"claimlens": analysis_pool})
+    outputs = executor.run("claim_1", {"analyze_claim": {"action": "analyze_claim"}}, fetch)
+    assert [o["step"] for o in outputs] == ["Claim analysis completed"]
+    assert threads["claimlens"].startswith("analysis")
+    assert threads["claimcenter"].startswith("mcp-step")
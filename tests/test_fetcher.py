@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+import cache
+from cache import EntityCache
+from fetcher import AsyncRequestFetcher, RequestFetcher
+from steps import Fetched
+
+URL = "http://cc/claims/c1"
+
+
+def test_concurrent_gets_for_a_url_share_one_fetch():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(url, etag=None):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return Fetched(200, {"claim_id": "c1"})
+
+    fetcher = RequestFetcher(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get(URL))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [URL]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert fetcher.stats()["upstream_calls"] == 1
+    assert fetcher.stats()["upstream_calls_saved"] == 7
+
+
+def test_failed_fetches_are_not_memoized():
+    outcomes = [RuntimeError("down"), Fetched(200, {})]
+
+    def fetch(url, etag=None):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    fetcher = RequestFetcher(fetch)
+    with pytest.raises(RuntimeError):
+        fetcher.get(URL)
+    assert fetcher.get(URL).status_code == 200
+    assert fetcher.get(URL).status_code == 200
+    assert fetcher.stats()["upstream_calls"] == 2
+
+
+def test_shared_cache_is_used_across_fetchers():
+    calls = []
+
+    def fetch(url, etag=None):
+        calls.append(url)
+        return Fetched(200, {"claim_id": "c1"}, "v1")
+
+    entities = EntityCache()
+    RequestFetcher(fetch, cache=entities).get(URL)
+    second = RequestFetcher(fetch, cache=entities)
+    assert second.get(URL).data == {"claim_id": "c1"}
+    assert len(calls) == 1
+    assert second.stats()["cache_hits"] == 1
+
+
+def test_stale_entry_is_revalidated_with_its_etag(monkeypatch):
+    sent = []
+
+    def fetch(url, etag=None):
+        sent.append(etag)
+        return Fetched(304, None, etag)
+
+    entities = EntityCache(claim_ttl=30)
+    entities.put(URL, Fetched(200, {"claim_id": "c1"}, "v1"))
+    later = cache.time.monotonic() + 31
+    monkeypatch.setattr(cache.time, "monotonic", lambda: later)
+
+    fetcher = RequestFetcher(fetch, cache=entities)
+    assert fetcher.get(URL).data == {"claim_id": "c1"}
+    assert sent == ["v1"]
+    assert fetcher.stats()["revalidated"] == 1
+
+
+def test_primed_urls_are_not_fetched():
+    fetcher = RequestFetcher(lambda url, etag=None: pytest.fail("fetched"))
+    fetcher.prime(URL, Fetched(200, {"claim_id": "c1"}))
+    assert fetcher.get(URL).data == {"claim_id": "c1"}
+
+
+def test_shared_urls_are_delegated():
+    calls = []
+
+    def fetch(url, etag=None):
+        calls.append(url)
+        return Fetched(200, {})
+
+    shared = RequestFetcher(fetch)
+    policy = "http://cc/policies/p1"
+    for _ in range(3):
+        RequestFetcher(fetch, shared=shared, share=lambda url: "/policies/" in url).get(policy)
+    assert calls == [policy]
+    assert shared.stats()["upstream_calls_saved"] == 2
+
+
+def test_async_concurrent_gets_share_one_fetch():
+    calls = []
+
+    async def fetch(url, etag=None):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return Fetched(200, {"claim_id": "c1"})
+
+    async def scenario():
+        fetcher = AsyncRequestFetcher(fetch)
+        results = await asyncio.gather(*(fetcher.get(URL) for _ in range(8)))
+        return fetcher, results
+
+    fetcher, results = asyncio.run(scenario())
+    assert calls == [URL]
+    assert all(r is results[0] for r in results)
+    assert fetcher.stats()["upstream_calls_saved"] == 7
@@ -0,0 +1,38 @@
+import pytest
+
+import orchestrator
+
+
+@pytest.fixture
+def client():
+    return orchestrator.app.test_client()
+
+
+@pytest.mark.parametrize("route", ["/orchestrate/batch", "/orchestrate/batch/stream"])
+@pytest.mark.parametrize("data, content_type", [
+    ("claim_1", "text/plain"),
+    ("{not json", "application/json"),
+    ("[]", "application/json"),
+])
+def test_batch_bodies_that_are_not_objects_get_a_json_400(client, route, data, content_type):
+    response = client.post(route, data=data, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object"}
+
+
+@pytest.mark.parametrize("route", ["/orchestrate", "/orchestrate/stream"])
+@pytest.mark.parametrize("body", [
+    {"prompt": ["claim"], "claim_id": "claim_1"},
+    {"prompt": {"text": "claim"}, "claim_id": "claim_1"},
+    {"prompt": "claim", "claim_id": 1},
+])
+def test_prompt_and_claim_id_must_be_strings(client, route, body):
+    response = client.post(route, json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "prompt and claim_id must be strings"}
+
+
+def test_batch_prompt_must_be_a_string(client):
+    response = client.post("/orchestrate/batch", json={"prompt": ["claim"], "claim_ids": ["claim_1"]})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "prompt must be a string"}
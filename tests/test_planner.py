@@ -0,0 +1,136 @@
+import os
+import random
+import re
+
+import pytest
+
+from planner import INTENTS, Planner, normalize, plan
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_actions(prompt):
+    """The substring rules plan() ran before the intent table, frozen here
+    (minus its set-ordered output) to check the compiled planner against."""
+    prompt = prompt.lower()
+    actions = set()
+    if "claim" in prompt or "claim details" in prompt or "claim info" in prompt or "claim detail" in prompt:
+        actions |= {"get_claim"}
+    if "policy details" in prompt or "policy info" in prompt:
+        actions |= {"get_claim", "get_policy"}
+    if "coverages" in prompt or "coverage" in prompt or "policy coverages" in prompt or "coverage details" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_coverages"}
+    if "endorsements" in prompt or "policy endorsements" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_endorsements"}
+    if "injuries" in prompt:
+        actions |= {"get_claim", "get_policy", "get_accident_injuries"}
+    if "documents" in prompt:
+        actions |= {"get_documents"}
+    if "date of loss" in prompt or "loss date" in prompt:
+        actions |= {"get_claim", "get_claim_loss_date"}
+    if "accident occur" in prompt or "accident location" in prompt:
+        actions |= {"get_claim", "get_accident_location"}
+    if "effective date" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_effective_date"}
+    if "expiration date" in prompt or "expiry date" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_expiration_date"}
+    if "policy period" in prompt or "policy effective date" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_period"}
+    if "premium" in prompt:
+        actions |= {"get_claim", "get_policy", "get_policy_premium"}
+    if "vehicle" in prompt or "vehicle details" in prompt or "vehicle info" in prompt:
+        actions |= {"get_claim", "get_policy", "get_vehicle_details"}
+    return actions or {"unsupported"}
+
+
+# The intent table without the intents added after the substring rules
+LEGACY_INTENTS = [intent for intent in INTENTS if intent.action != "analyze_claim"]
+KEYWORDS = [keyword for intent in LEGACY_INTENTS for keyword in intent.keywords]
+FILLER = ["what", "is", "the", "of", "for", "this", "policy", "date", "loss", "details", "info", "accident"]
+
+
+def generated_prompts(count, seed=0):
+    """Keywords, fragments of keywords and filler glued together with and
+    without spaces, so keywords overlap, nest and get cut off. Normalized, as
+    plan() matches the normalized prompt."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        pieces = []
+        for _ in range(rng.randint(1, 6)):
+            word = rng.choice(KEYWORDS + FILLER)
+            if rng.random() < 0.3:
+                start = rng.randrange(len(word))
+                word = word[start:rng.randint(start + 1, len(word))]
+            pieces.append(word)
+        yield normalize("".join(piece + ("" if rng.random() < 0.3 else " ") for piece in pieces))
+
+
+def demo_prompts():
+    with open(os.path.join(ROOT, "demo-question-list.md")) as f:
+        return [line.split(". ", 1)[1].strip() for line in f if re.match(r"\d+\. ", line)]
+
+
+def actions(steps):
+    return [step["action"] for step in steps]
+
+
+def test_matches_the_legacy_rules_on_generated_prompts():
+    planner = Planner(LEGACY_INTENTS)
+    for prompt in generated_prompts(20000):
+        assert set(actions(planner.plan(prompt))) == legacy_actions(prompt), prompt
+
+
+def test_matches_the_legacy_rules_on_the_demo_questions():
+    planner = Planner(LEGACY_INTENTS)
+    for prompt in demo_prompts():
+        normalized = normalize(prompt)
+        assert set(actions(planner.plan(normalized))) == legacy_actions(normalized), prompt
+
+
+def test_actions_come_in_table_order():
+    order = [intent.action for intent in INTENTS]
+    planner = Planner()
+    for prompt in generated_prompts(2000, seed=1):
+        planned = actions(planner.plan(prompt))
+        assert planned == ["unsupported"] or planned == sorted(planned, key=order.index)
+
+
+def test_keyword_order_in_the_prompt_does_not_change_the_plan():
+    planner = Planner()
+    forward = planner.plan("premium vehicle documents coverage claim")
+    backward = planner.plan("claim coverage documents vehicle premium")
+    assert forward == backward
+    assert actions(forward) == [
+        "get_claim", "get_policy", "get_policy_coverages", "get_documents",
+        "get_policy_premium", "get_vehicle_details",
+    ]
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("policy info", ["get_claim", "get_policy"]),
+    ("When is the expiry date?", ["get_claim", "get_policy", "get_policy_expiration_date"]),
+    ("What documents are attached?", ["get_documents"]),
+    ("What are your recommended next actions?", ["analyze_claim"]),
+    ("Who is the insured?", ["unsupported"]),
+])
+def test_implied_actions_are_resolved_from_the_table(prompt, expected):
+    assert actions(plan(prompt, "claim_1")) == expected
+
+
+def test_requires_are_transitive():
+    planner = Planner([
+        INTENTS[0],
+        INTENTS[1],
+        INTENTS[0]._replace(action="deep", keywords=("deep",), requires=("get_policy",)),
+    ])
+    assert actions(planner.plan("deep")) == ["get_claim", "get_policy", "deep"]
+
+
+def test_overlapping_keywords_of_different_intents_all_fire():
+    planner = Planner([
+        INTENTS[0]._replace(action="a", keywords=("loss",)),
+        INTENTS[0]._replace(action="b", keywords=("loss date",)),
+        INTENTS[0]._replace(action="c", keywords=("date of loss",)),
+    ])
+    assert actions(planner.plan("loss date")) == ["a", "b"]
+    assert actions(planner.plan("date of loss date")) == ["a", "b", "c"]
@@ -0,0 +1,31 @@
+import pytest
+
+from steps import GRAPH, Fetched, StepContext
+
+CTX = StepContext("claim_1", {"action": "analyze_claim"}, {"documents": []})
+
+
+def analysis(fetched):
+    return GRAPH["analyze_claim"].build(CTX, fetched)
+
+
+def test_finished_job_returns_its_result():
+    step = analysis(Fetched(200, {"job_id": "j1", "status": "done", "result": {"risk_score": 3}}))
+    assert step == {"step": "Claim analysis completed", "data": {"risk_score": 3}}
+
+
+def test_running_job_is_in_progress():
+    step = analysis(Fetched(202, {"job_id": "j1", "status": "running"}))
+    assert step["step"] == "Claim analysis in progress"
+    assert step["data"] == {"job_id": "j1", "status": "running"}
+
+
+@pytest.mark.parametrize("fetched, message", [
+    (Fetched(429, {"error": "Queue is full"}), "ClaimLens is busy, ask again shortly."),
+    (Fetched(400, {"error": "Missing claim_id or documents is not a list"}),
+     "Missing claim_id or documents is not a list"),
+    (Fetched(404, {"error": "Job not found"}), "Job not found"),
+    (Fetched(404, None), "ClaimLens answered 404."),
+])
+def test_error_responses_fail_the_step(fetched, message):
+    assert analysis(fetched) == {"step": "Claim analysis failed", "message": message}
@@ -0,0 +1,42 @@
+import pytest
+
+from generate_data import generate, write
+from storage import JsonStore, SqliteStore, import_json
+
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+    write(str(data_dir), generate(60))
+    db_path = str(data_dir / "claimcenter.db")
+    import_json(str(data_dir), db_path)
+    return JsonStore(str(data_dir)), SqliteStore(db_path)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"status": "Open"},
+    {"lob": "Auto"},
+    {"policy_id": "policy_3"},
+    {"loss_date_from": "2024-06-01", "loss_date_to": "2024-12-31"},
+])
+def test_backends_find_the_same_claims(stores, filters):
+    found = [{c["claim_id"] for c in store.search_claims(limit=1000, **filters)} for store in stores]
+    assert found[0] == found[1]
+
+
+@pytest.mark.parametrize("limit", [0, 1, 7])
+def test_backends_apply_the_same_limit(stores, limit):
+    assert [len(store.search_claims(limit=limit)) for store in stores] == [limit, limit]
+
+
+def test_search_limit_is_clamped(monkeypatch, stores):
+    import app
+
+    json_store, _ = stores
+    monkeypatch.setattr(app, "store", json_store)
+    monkeypatch.setattr(app.responses, "maxbytes", 0)
+    client = app.app.test_client()
+    for limit, expected in (("-1", 1), ("0", 1), ("5", 5), ("5000", 60)):
+        claims = client.get(f"/claims?limit={limit}").get_json()["claims"]
+        assert len(claims) == expected, limit
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+import requests
+
+from async_upstream import AsyncUpstreamClient
+from upstream import CircuitBreaker, CircuitOpenError, UpstreamClient, UpstreamError
+
+
+class Response:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.headers = {}
+        self._data = data
+
+    def json(self):
+        if self._data is None:
+            raise ValueError("not JSON")
+        return self._data
+
+
+def client(send, threshold=5, reset_timeout=30.0, retries=2):
+    """UpstreamClient whose attempts are ``send(attempt)``."""
+    upstream = UpstreamClient(
+        "test", "http://upstream", retries=retries, backoff=0,
+        breaker=CircuitBreaker(threshold=threshold, reset_timeout=reset_timeout),
+    )
+    calls = []
+
+    def _send(method, url, headers, body):
+        calls.append(url)
+        return send(len(calls))
+
+    upstream._send = _send
+    return upstream, calls
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker._opened_at -= 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_release_frees_the_trial_without_an_outcome():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+def test_retries_transport_errors_then_succeeds():
+    def send(attempt):
+        if attempt == 1:
+            raise requests.exceptions.ChunkedEncodingError("truncated")
+        if attempt == 2:
+            return Response(503)
+        return Response(200, {"ok": True})
+
+    upstream, calls = client(send)
+    assert upstream.get("http://upstream/x").data == {"ok": True}
+    assert len(calls) == 3
+    assert upstream.stats()["retries"] == 2
+
+
+def test_exhausted_retries_raise_and_count_towards_the_breaker():
+    def send(attempt):
+        raise requests.exceptions.ContentDecodingError("bad gzip")
+
+    upstream, calls = client(send, threshold=1, retries=1)
+    with pytest.raises(UpstreamError):
+        upstream.get("http://upstream/x")
+    assert len(calls) == 2
+    assert upstream.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        upstream.get("http://upstream/x")
+    assert len(calls) == 2
+
+
+def test_non_json_error_page_is_returned_not_raised():
+    upstream, _ = client(lambda attempt: Response(404))
+    assert upstream.get("http://upstream/x").status_code == 404
+    assert upstream.breaker.state == "closed"
+
+
+def test_unexpected_error_in_the_trial_does_not_wedge_the_circuit():
+    def send(attempt):
+        if attempt == 1:
+            raise RuntimeError("bug")
+        return Response(200, {})
+
+    upstream, _ = client(send, threshold=1, reset_timeout=0)
+    upstream.breaker.record_failure()
+    with pytest.raises(RuntimeError):
+        upstream.get("http://upstream/x")
+    assert upstream.get("http://upstream/x").status_code == 200
+    assert upstream.breaker.state == "closed"
+
+
+def test_cancelled_async_trial_releases_the_circuit():
+    async def scenario():
+        upstream = AsyncUpstreamClient(
+            "test", "http://upstream",
+            breaker=CircuitBreaker(threshold=1, reset_timeout=0),
+        )
+        started = asyncio.Event()
+
+        async def hang(method, url, headers, body):
+            started.set()
+            await asyncio.sleep(60)
+
+        async def ok(method, url, headers, body):
+            return 200, b"{}", None
+
+        upstream.breaker.record_failure()
+        upstream._send = hang
+        trial = asyncio.ensure_future(upstream.get("http://upstream/x"))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        upstream._send = ok
+        assert (await upstream.get("http://upstream/x")).status_code == 200
+        return upstream.breaker.state
+
+    assert asyncio.run(scenario()) == "closed"